@@ -1,4 +1,5 @@
 from .accounts import get_db_account_by_id_from_path
+from .fields import Fields
 from .filters import Filters
 from .sso import optional_sso_auth, sso_auth
 from .transactions import get_transaction_by_id_from_path
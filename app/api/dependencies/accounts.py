@@ -1,12 +1,12 @@
 from fastapi import HTTPException, Path, status
 from pydantic.types import UUID4
+from sqlalchemy.engine import Row
 
 from app.database.errors import EntityDoesNotExist
-from app.models.accounts import AccountDB
 from app.services.accounts import get_db_account_by_id
 
 
-async def get_db_account_by_id_from_path(account_id: UUID4 = Path(...)) -> AccountDB:
+async def get_db_account_by_id_from_path(account_id: UUID4 = Path(...)) -> Row:
     try:
         return await get_db_account_by_id(account_id)
     except EntityDoesNotExist as error:
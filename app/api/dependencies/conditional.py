@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import Header
+from fastapi.responses import Response
+from starlette import status
+
+from app.settings import app_settings
+
+
+class IfNoneMatch:
+    """If-None-Match request header: entity tags of the client's cached response"""
+
+    def __init__(
+        self,
+        if_none_match: Optional[str] = Header(
+            None, description="ETag of a cached response: `304 Not Modified` if equal"
+        ),
+    ):
+        self.any = False
+        self.etags: frozenset = frozenset()
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(",") if t.strip()]
+            self.any = "*" in tags
+            # weak comparison (RFC 7232): W/"x" matches "x"
+            self.etags = frozenset(t[2:] if t.startswith("W/") else t for t in tags)
+
+    def __bool__(self):
+        return self.any or bool(self.etags)
+
+    def matches(self, etag: str) -> bool:
+        return self.any or etag in self.etags
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": app_settings.ACCOUNTS_CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag)
+    )
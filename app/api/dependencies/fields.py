@@ -0,0 +1,77 @@
+from typing import Optional
+
+from fastapi import Query
+from fastapi.exceptions import RequestValidationError
+from pydantic.error_wrappers import ErrorWrapper
+
+from app.models.accounts import COMPANY_NAME_COLUMN, AccountDB
+from app.types import CaseInsensitiveEnum
+
+
+class PropertyName(str, CaseInsensitiveEnum):
+    id = "id"
+    type = "type"
+    currency = "currency"
+    account = "account"
+    company_id = "company_id"
+    company_name = "company_name"
+    additional_info = "additional_info"
+    created = "created"
+    modified = "modified"
+
+
+PROPERTY_TO_MODEL_MAP = {
+    PropertyName.id: AccountDB.id,
+    PropertyName.type: AccountDB.type,
+    PropertyName.currency: AccountDB.currency,
+    PropertyName.account: AccountDB.account,
+    PropertyName.company_id: AccountDB.company_id,
+    PropertyName.company_name: COMPANY_NAME_COLUMN,
+    PropertyName.additional_info: AccountDB.additional_info,
+    PropertyName.created: AccountDB.created,
+    PropertyName.modified: AccountDB.modified,
+}
+
+# always selected: the account type defines the response schema
+REQUIRED_PROPERTIES = (PropertyName.id, PropertyName.type)
+
+
+class Fields:
+
+    properties = None
+
+    def __init__(
+        self,
+        fields: Optional[str] = Query(
+            None,
+            description="Comma-separated list of fields to return (all schema fields by default),"
+            " `id` is always returned",
+        ),
+    ):
+        if fields:
+            try:
+                self.properties = frozenset(
+                    PropertyName(f.strip()) for f in fields.split(",") if f.strip()
+                ) | {PropertyName.id}
+            except ValueError as error:
+                raise RequestValidationError([ErrorWrapper(error, ("query", "fields"))])
+
+    @property
+    def names(self) -> Optional[frozenset]:
+        """Requested field names, None for the full response"""
+        if self.properties is None:
+            return None
+        return frozenset(p.value for p in self.properties)
+
+    def columns(self) -> Optional[list]:
+        """Columns to select, None for the full response"""
+        if self.properties is None:
+            return None
+        return [
+            PROPERTY_TO_MODEL_MAP[p]
+            for p in PropertyName
+            if p in self.properties or p in REQUIRED_PROPERTIES
+        ]
+
+    def __str__(self):
+        return ",".join(sorted(self.names)) if self.properties is not None else "*"
@@ -1,6 +1,7 @@
 import json
 from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
 from inspect import signature
 from itertools import chain
 from typing import Any, Optional
@@ -10,10 +11,15 @@ from fastapi import Query
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, ValidationError, validator
 from pydantic.error_wrappers import ErrorWrapper
-from sqlalchemy import and_, not_, or_
-from sqlalchemy.ext.associationproxy import ObjectAssociationProxyInstance
+from sqlalchemy import all_, and_, any_, bindparam, not_, or_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.associationproxy import (
+    AssociationProxyInstance,
+    ObjectAssociationProxyInstance,
+)
 
 from app.models.accounts import AccountDB
+from app.settings import app_settings
 from app.types import AccountType, CaseInsensitiveEnum, CurrencyNumericCode
 
 
@@ -36,20 +42,64 @@ def ilike_patch(attr, *args, **kwargs):
     return filter_attr.ilike(*args, **kwargs)
 
 
+def _array_param(attr, values):
+    # one array bind parameter for any number of values: the SQL text (and so the
+    # asyncpg prepared statement and the SQLAlchemy compiled cache entry) is the same
+    column = attr.remote_attr if isinstance(attr, AssociationProxyInstance) else attr
+    return bindparam(None, list(values), type_=postgresql.ARRAY(column.type))
+
+
+def in_patch(attr, values):
+    return attr == any_(_array_param(attr, values))
+
+
+def not_in_patch(attr, values):
+    return attr != all_(_array_param(attr, values))
+
+
+class JsonbKey(namedtuple("JsonbKey", ("column", "key"))):
+    """
+    Top-level key of a JSONB column. Compared by containment (`@>`) only,
+    which the jsonb_path_ops GIN index on the column can serve.
+    """
+
+    OPERATORS = {
+        "=": lambda p, v: p.contains(v),
+        "!=": lambda p, v: ~p.contains(v),
+        "in": lambda p, v: or_(*[p.contains(i) for i in v]),
+        "not_in": lambda p, v: not_(or_(*[p.contains(i) for i in v])),
+    }
+
+    def contains(self, value):
+        return self.column.contains({self.key: value})
+
+
 class PropertyName(str, CaseInsensitiveEnum):
     type = "type"
+    account = "account"
     client = "client"
     client_id = "client_id"
     currency = "currency"
     modified = "modified"
+    bank_name = "additional_info.bank_name"
+    beneficiary_name = "additional_info.beneficiary_name"
+    beneficiary_address = "additional_info.beneficiary_address"
 
 
 PROPERTY_TO_MODEL_MAP = {
     PropertyName.type: AccountDB.type,
-    PropertyName.client_id: AccountDB.factoring_company_id,
-    PropertyName.client: AccountDB.factoring_company_name,
+    PropertyName.account: AccountDB.account,
+    PropertyName.client_id: AccountDB.company_id,
+    PropertyName.client: AccountDB.company_name,
     PropertyName.currency: AccountDB.currency,
     PropertyName.modified: AccountDB.modified,
+    PropertyName.bank_name: JsonbKey(AccountDB.additional_info, "bank_name"),
+    PropertyName.beneficiary_name: JsonbKey(
+        AccountDB.additional_info, "beneficiary_name"
+    ),
+    PropertyName.beneficiary_address: JsonbKey(
+        AccountDB.additional_info, "beneficiary_address"
+    ),
 }
 
 
@@ -80,8 +130,8 @@ class Operator:
         "like": lambda p, v: like_patch(p, v),
         "ilike": lambda p, v: ilike_patch(p, v),
         "not_ilike": lambda p, v: ~ilike_patch(p, v),
-        "in": lambda p, v: p.in_(v),
-        "not_in": lambda p, v: ~p.in_(v),
+        "in": lambda p, v: in_patch(p, v),
+        "not_in": lambda p, v: not_in_patch(p, v),
         # "any": lambda p, v: p.any(v),
         # "not_any": lambda p, v: func.not_(p.any(v)),
     }
@@ -108,25 +158,33 @@ class FilterExpression(BaseModel):
 
     @validator("value")
     def type_of_value(cls, v, values, **kwargs):
+        """Validates the value and casts it to the type of the model field"""
+        operator = values.get("operator")
+        if (
+            operator
+            and operator.operator in ("in", "not_in")
+            and not isinstance(v, list)
+        ):
+            raise ValueError(f"Operator `{operator}` requires a list value")
         if "property" in values:
-            if values["property"] == PropertyName.type:
-                [AccountType(t) for t in v] if isinstance(v, list) else AccountType(v)
+            model_field = PROPERTY_TO_MODEL_MAP[values["property"]]
+            if isinstance(model_field, JsonbKey):
+                if operator and operator.operator not in JsonbKey.OPERATORS:
+                    property_name = values["property"].value
+                    raise ValueError(
+                        f"Operator `{operator}` not valid for `{property_name}`"
+                    )
+                cast = str
+            elif values["property"] == PropertyName.type:
+                cast = AccountType
             elif values["property"] in (PropertyName.modified,):
-                [datetime.fromisoformat(t) for t in v] if isinstance(
-                    v, list
-                ) else datetime.fromisoformat(v)
+                cast = datetime.fromisoformat
             elif values["property"] == PropertyName.currency:
-                [CurrencyNumericCode.validate(t) for t in v] if isinstance(
-                    v, list
-                ) else CurrencyNumericCode.validate(v)
-
-        return v
+                cast = CurrencyNumericCode.validate
+            else:
+                return v
+            v = [cast(t) for t in v] if isinstance(v, list) else cast(v)
 
-    def _cast_sql_value(self):
-        if self.property in (PropertyName.modified,):
-            v = datetime.fromisoformat(self.value)
-        else:
-            v = self.value
         return v
 
     def build_sqlalchemy_filter(self):
@@ -134,7 +192,10 @@ class FilterExpression(BaseModel):
 
         function = self.operator.function
         arity = self.operator.arity
-        sql_value = self._cast_sql_value()
+        sql_value = self.value
+
+        if isinstance(model_field, JsonbKey):
+            return model_field.OPERATORS[str(self.operator)](model_field, sql_value)
 
         if isinstance(model_field, (tuple, list)):
             if arity == 2:
@@ -168,9 +229,49 @@ class BooleanGroup:
         return exp.join(str(f) for f in self.filters)
 
 
+def _build_criteria(filters_spec):
+    if isinstance(filters_spec, list):
+        return list(chain.from_iterable(_build_criteria(f) for f in filters_spec))
+
+    if isinstance(filters_spec, dict):
+        criteria = []
+        for expression in BOOLEAN_EXPRESSIONS:
+            if expression.exp in filters_spec.keys():
+                exp_args = filters_spec[expression.exp]
+                criteria.append(
+                    BooleanGroup(
+                        expression,
+                        *_build_criteria(exp_args),
+                    )
+                )
+                return criteria
+
+    return [
+        FilterExpression(
+            property=filters_spec["property"].lower(),
+            operator=Operator(filters_spec["operator"].lower()),
+            value=filters_spec.get("value"),
+        )
+    ]
+
+
+@lru_cache(maxsize=app_settings.FILTERS_CACHE_SIZE)
+def parse_filters(filters: str) -> tuple:
+    """
+    Raw filter string -> (validated criteria, sqlalchemy filters).
+    Cached: the same filter string is decoded, validated and built only once.
+    Values are bound parameters, so the cached expressions also share one entry
+    in the SQLAlchemy compiled statement cache.
+    """
+    criteria = tuple(_build_criteria(json.loads(parse.unquote(filters))))
+    return criteria, tuple(c.build_sqlalchemy_filter() for c in criteria)
+
+
 class Filters:
 
-    criteria = []
+    raw = None
+    criteria = ()
+    sqlalchemy_filters = ()
 
     def __init__(
         self,
@@ -180,44 +281,15 @@ class Filters:
     ):
         if filters:
             try:
-                self.criteria = self._build_criteria(json.loads(parse.unquote(filters)))
+                self.criteria, self.sqlalchemy_filters = parse_filters(filters)
             except (json.JSONDecodeError, ValidationError, ValueError) as error:
                 raise RequestValidationError(
                     [ErrorWrapper(error, ("query", "filters"))]
                 )
-
-    def _build_criteria(self, filters_spec):
-        if isinstance(filters_spec, list):
-            return list(
-                chain.from_iterable(self._build_criteria(f) for f in filters_spec)
-            )
-
-        if isinstance(filters_spec, dict):
-            criteria = []
-            for expression in BOOLEAN_EXPRESSIONS:
-                if expression.exp in filters_spec.keys():
-                    exp_args = filters_spec[expression.exp]
-                    criteria.append(
-                        BooleanGroup(
-                            expression,
-                            *self._build_criteria(exp_args),
-                        )
-                    )
-                    return criteria
-
-        return [
-            FilterExpression(
-                property=filters_spec["property"].lower(),
-                operator=Operator(filters_spec["operator"].lower()),
-                value=filters_spec.get("value"),
-            )
-        ]
-
-    def _build_sqlalchemy_filters(self):
-        return [c.build_sqlalchemy_filter() for c in self.criteria]
+            self.raw = filters
 
     def apply(self, query):
-        sqlalchemy_filters = self._build_sqlalchemy_filters()
+        sqlalchemy_filters = self.sqlalchemy_filters
         if sqlalchemy_filters:
             return query.filter(*sqlalchemy_filters)
         return query
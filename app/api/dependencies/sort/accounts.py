@@ -26,3 +26,6 @@ class AccountsSortExpression(SortExpressionBase):
 class AccountsSort(SortBase):
     def get_expression_class(self):
         return AccountsSortExpression
+
+    def get_tiebreaker(self):
+        return AccountDB.id
@@ -1,5 +1,6 @@
 import json
 from abc import abstractmethod
+from functools import lru_cache
 from itertools import chain
 from typing import Optional
 from urllib import parse
@@ -9,6 +10,7 @@ from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, Field, ValidationError
 from pydantic.error_wrappers import ErrorWrapper
 
+from app.settings import app_settings
 from app.types import CaseInsensitiveEnum
 
 
@@ -43,30 +45,62 @@ class SortExpressionBase(BaseModel):
         return f"{self.property.value} {self.direction.value}"
 
 
+def _build_criteria(expression_class, sort_spec):
+    if isinstance(sort_spec, list):
+        return list(
+            chain.from_iterable(_build_criteria(expression_class, f) for f in sort_spec)
+        )
+
+    return [expression_class(**sort_spec)]
+
+
+@lru_cache(maxsize=app_settings.FILTERS_CACHE_SIZE)
+def parse_sort(expression_class, sort: str) -> tuple:
+    """Raw sort string -> validated criteria, cached per sort expression class"""
+    return tuple(_build_criteria(expression_class, json.loads(parse.unquote(sort))))
+
+
 class SortBase:
     @abstractmethod
     def get_expression_class(self):
         ...
 
+    def get_tiebreaker(self):
+        """Unique model field appended to the sort to make the order total"""
+        return None
+
     def __init__(
         self,
         sort: Optional[str] = Query(None, description="Sort parameters (url encoded)"),
     ):
+        self.raw = sort
         self.criteria = [self.get_expression_class()()]
         if sort:
             try:
-                self.criteria = self._build_criteria(json.loads(parse.unquote(sort)))
+                self.criteria = parse_sort(self.get_expression_class(), sort)
             except (json.JSONDecodeError, ValidationError, ValueError) as error:
                 raise RequestValidationError([ErrorWrapper(error, ("query", "sort"))])
 
-    def _build_criteria(self, sort_spec):
-        if isinstance(sort_spec, list):
-            return list(chain.from_iterable(self._build_criteria(f) for f in sort_spec))
-
-        return [self.get_expression_class()(**sort_spec)]
-
     def _build_sqlalchemy_sort(self):
-        return [c.build_sqlalchemy_sort() for c in self.criteria]
+        sqlalchemy_sort = [c.build_sqlalchemy_sort() for c in self.criteria]
+        tiebreaker = self.get_tiebreaker()
+        if tiebreaker is not None:
+            if self.criteria and self.criteria[-1].direction == SortDirection.asc:
+                sqlalchemy_sort.append(tiebreaker.asc())
+            else:
+                sqlalchemy_sort.append(tiebreaker.desc())
+        return sqlalchemy_sort
+
+    def get_keyset(self):
+        """Sort as a list of (model field, descending) pairs for keyset pagination"""
+        keyset = [
+            (c.get_model_by_property(), c.direction == SortDirection.desc)
+            for c in self.criteria
+        ]
+        tiebreaker = self.get_tiebreaker()
+        if tiebreaker is not None:
+            keyset.append((tiebreaker, keyset[-1][1] if keyset else True))
+        return keyset
 
     def apply(self, query):
         sqlalchemy_sort = self._build_sqlalchemy_sort()
@@ -1,12 +1,13 @@
 import logging
 from typing import Optional
 
+import httpx
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import ValidationError
 
 from app.schemas.auth import User
-from app.services.auth_service import PrivateAuthService
+from app.services.auth_service import InvalidToken, PrivateAuthService
 
 logger = logging.getLogger("app")
 
@@ -28,10 +29,23 @@ class SSOAuth(HTTPBearer):
                 )
             return User.anonymous()
         try:
-            auth_info = sso_service.introspect(credentials.credentials)
+            auth_info = await sso_service.authenticate(credentials.credentials)
             user = User(**auth_info)
             # user.referer = request.headers.get("referer")
             # user.ip_address = request.client
+        except InvalidToken:
+            if self.auto_error:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Unauthorized access. Invalid or expired token.",
+                )
+            return User.anonymous()
+        except httpx.HTTPError as error:
+            logger.error(f"SSOAuth introspection error: {str(error)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authorization service is unavailable.",
+            )
         except ValidationError as error:
             logger.error(f"SSOAuth response validation error: {str(error)}")
             return User.anonymous()
@@ -1,49 +1,320 @@
 import logging
-from typing import Any
+from typing import Any, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
-from fastapi_pagination import Page
-from pydantic import UUID4
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    status,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import UUID4, conlist
+from pydantic.error_wrappers import ErrorWrapper
 
-from app.api.dependencies import Filters, optional_sso_auth
+from app.api.dependencies import Fields, Filters, optional_sso_auth
+from app.api.dependencies.conditional import IfNoneMatch, cache_headers, not_modified
 from app.api.dependencies.sort.accounts import AccountsSort
-from app.database.errors import EntityDoesNotExist
-from app.schemas import AccountResponse
+from app.database.errors import (
+    ConflictWhenInsert,
+    EntityDoesNotExist,
+    InvalidPageCursor,
+)
+from app.paginate_patch import CursorPage, PageEx, decode_cursor
+from app.schemas.accounts import AccountLookupDTO, AccountsByCompaniesDTO
 from app.schemas.auth import User
+from app.schemas.create.accounts import AccountCreateDTO
+from app.schemas.response.accounts import (
+    AccountBulkItemResponse,
+    AccountChangesResponse,
+    AccountLookupResponse,
+)
 from app.services.accounts import (
+    CHANGES_KEYSET,
+    create_account,
+    create_accounts_bulk,
+    get_account_changes,
+    get_account_json_by_id,
+    get_account_json_by_number,
     get_accounts_page,
-    get_db_account_by_id,
-    get_db_account_by_number,
-    get_db_accounts_by_company_id,
+    get_company_accounts,
+    get_db_accounts_by_company_ids,
+    lookup_db_accounts,
+    stream_accounts_by_company_ids,
+)
+from app.services.events import account_events
+from app.services.export import (
+    EXPORT_MEDIA_TYPES,
+    export_accounts,
+    is_export_format_available,
 )
-from app.types import BankAccountNumber
+from app.services.imports import IMPORT_MEDIA_TYPES, import_accounts, read_report
+from app.settings import app_settings
+from app.types import BankAccountNumber, ExportFormat, ImportFormat, TotalMode
 
 logger = logging.getLogger("app")
 
-router = APIRouter(tags=["accounts"])
+# handlers return ORJSONResponse with already serialized content:
+# response_model is only used for the OpenAPI schema
+router = APIRouter(tags=["accounts"], default_response_class=ORJSONResponse)
 
 
-@router.get("/", summary="Get accounts list by page", response_model=Page[Any])
+@router.get(
+    "/",
+    summary="Get accounts list by page",
+    response_model=Union[PageEx[Any], CursorPage[Any]],
+)
 @router.get(
     "",
     summary="Get accounts list by page",
-    response_model=Page[Any],
+    response_model=Union[PageEx[Any], CursorPage[Any]],
     include_in_schema=False,
 )
 async def get_accounts(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor: empty value for the first page,"
+        " then `next_cursor` of the previous page (`page` is ignored)",
+    ),
+    include_total: bool = Query(
+        True,
+        description="Count the total number of accounts (`total: null` if false)",
+    ),
+    total_mode: TotalMode = Query(
+        TotalMode.exact,
+        description="`estimate`: planner row estimate for large results"
+        " (`total_estimated: true`), exact count otherwise",
+    ),
     filters: Filters = Depends(),
     sort: AccountsSort = Depends(),
+    fields: Fields = Depends(),
+    if_none_match: IfNoneMatch = Depends(),
+    auth_user: User = Depends(optional_sso_auth),
+) -> Response:
+    try:
+        result_page, etag = await get_accounts_page(
+            page=page,
+            size=size,
+            cursor=cursor,
+            include_total=include_total,
+            total_mode=total_mode,
+            filters=filters,
+            sort=sort,
+            fields=fields,
+            if_none_match=if_none_match,
+        )
+    except InvalidPageCursor as error:
+        raise RequestValidationError([ErrorWrapper(error, ("query", "cursor"))])
+    if result_page is None:
+        return not_modified(etag)
+    return ORJSONResponse(result_page.dict(), headers=cache_headers(etag))
+
+
+@router.post(
+    "/",
+    summary="Create account",
+    response_model=Any,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Account of the company in this currency already exists"
+        },
+        status.HTTP_409_CONFLICT: {"description": "Account number already exists"},
+    },
+)
+@router.post(
+    "",
+    summary="Create account",
+    response_model=Any,
+    status_code=status.HTTP_201_CREATED,
+    include_in_schema=False,
+)
+async def create_new_account(
+    account: AccountCreateDTO = Body(...),
+    auth_user: User = Depends(optional_sso_auth),
+) -> ORJSONResponse:
+    try:
+        result, created = await create_account(account)
+    except ConflictWhenInsert as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    return ORJSONResponse(
+        result,
+        status_code=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+    )
+
+
+@router.get(
+    "/export",
+    summary="Export accounts list (streaming NDJSON, CSV, Arrow IPC or Parquet)",
+    response_class=StreamingResponse,
+)
+async def export_accounts_list(
+    export_format: ExportFormat = Query(
+        ExportFormat.ndjson, alias="format", description="Export format"
+    ),
+    filters: Filters = Depends(),
+    sort: AccountsSort = Depends(),
+    auth_user: User = Depends(optional_sso_auth),
+) -> StreamingResponse:
+    if not is_export_format_available(export_format):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Export format '{export_format.value}' is not available",
+        )
+    return StreamingResponse(
+        export_accounts(export_format=export_format, filters=filters, sort=sort),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="accounts.{export_format.value}"'
+        },
+    )
+
+
+@router.get(
+    "/changes",
+    summary="Get account changes after a watermark (incremental sync)",
+    response_model=AccountChangesResponse,
+)
+async def get_changes(
+    since: str = Query(
+        "",
+        description="Watermark: empty value for the first poll,"
+        " then `since` of the previous response",
+    ),
+    limit: int = Query(
+        500,
+        ge=1,
+        le=app_settings.ACCOUNTS_CHANGES_MAX_SIZE,
+        description="Max number of changes",
+    ),
+    auth_user: User = Depends(optional_sso_auth),
+) -> ORJSONResponse:
+    try:
+        changes = await get_account_changes(since=since, limit=limit)
+    except InvalidPageCursor as error:
+        raise RequestValidationError([ErrorWrapper(error, ("query", "since"))])
+    return ORJSONResponse(changes)
+
+
+@router.get(
+    "/events",
+    summary="Stream account changes (Server-Sent Events)",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"text/event-stream": {}}},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Change notifications are disabled"
+        },
+    },
+)
+async def stream_account_events(
+    request: Request,
+    since: Optional[str] = Query(
+        None,
+        description="Change feed watermark (or event id) to resume from:"
+        " the changes after it are sent first",
+    ),
+    last_event_id: Optional[str] = Header(None),
     auth_user: User = Depends(optional_sso_auth),
-) -> Page[AccountResponse]:
-    result_page = await get_accounts_page(
-        page=page,
-        size=size,
-        filters=filters,
-        sort=sort,
+) -> StreamingResponse:
+    """
+    Events `created`, `updated`, `archived` (and `deleted`), the data is the account
+    id, number, company ID, archived flag and modified time. The event id is the
+    change feed watermark: on reconnect (the `Last-Event-ID` header) the missed
+    changes are replayed. A change may be sent twice.
+    """
+    broadcaster = getattr(request.app.state, "change_broadcaster", None)
+    if broadcaster is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Change notifications are disabled (DB_LISTEN_CHANGES)",
+        )
+    since = last_event_id or since
+    if since:
+        try:
+            decode_cursor(CHANGES_KEYSET, since)
+        except InvalidPageCursor as error:
+            raise RequestValidationError([ErrorWrapper(error, ("query", "since"))])
+    return StreamingResponse(
+        account_events(broadcaster, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/bulk",
+    summary="Create accounts in bulk",
+    response_model=list[AccountBulkItemResponse],
+)
+async def create_accounts(
+    accounts: conlist(  # type: ignore
+        AccountCreateDTO, min_items=1, max_items=app_settings.ACCOUNTS_BULK_MAX_SIZE
+    ) = Body(...),
+    auth_user: User = Depends(optional_sso_auth),
+) -> ORJSONResponse:
+    try:
+        results = await create_accounts_bulk(accounts)
+    except ConflictWhenInsert as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    return ORJSONResponse(results)
+
+
+@router.post(
+    "/lookup",
+    summary="Get accounts by IDs and/or numbers",
+    response_model=AccountLookupResponse,
+)
+async def lookup_accounts(
+    lookup: AccountLookupDTO = Body(...),
+    fields: Fields = Depends(),
+    auth_user: User = Depends(optional_sso_auth),
+) -> ORJSONResponse:
+    accounts = await lookup_db_accounts(
+        ids=lookup.ids, numbers=lookup.numbers, fields=fields
+    )
+    return ORJSONResponse(accounts)
+
+
+@router.post(
+    "/import",
+    summary="Import accounts (streaming CSV or NDJSON upload)",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string", "format": "binary"}}
+                for media_type in IMPORT_MEDIA_TYPES.values()
+            },
+        }
+    },
+)
+async def import_accounts_file(
+    request: Request,
+    import_format: ImportFormat = Query(
+        ImportFormat.ndjson, alias="format", description="Uploaded file format"
+    ),
+    auth_user: User = Depends(optional_sso_auth),
+) -> StreamingResponse:
+    """
+    The request body is the file, read as a stream. The response is an NDJSON report:
+    a line per invalid or not created row, then a summary.
+    """
+    try:
+        report = await import_accounts(request.stream(), import_format)
+    except ConflictWhenInsert as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    return StreamingResponse(
+        read_report(report), media_type=IMPORT_MEDIA_TYPES[ImportFormat.ndjson]
     )
-    return result_page
 
 
 @router.get(
@@ -52,14 +323,22 @@ async def get_accounts(
     response_model=Any,
 )
 async def get_account_by_number(
-    number: BankAccountNumber = Query(..., description="Account number"),
+    number: BankAccountNumber = Path(..., description="Account number"),
+    fields: Fields = Depends(),
+    if_none_match: IfNoneMatch = Depends(),
     auth_user: User = Depends(optional_sso_auth),
-) -> AccountResponse:
+) -> Response:
     try:
-        account = await get_db_account_by_number(number)
+        content, etag = await get_account_json_by_number(
+            number, fields=fields, if_none_match=if_none_match
+        )
     except EntityDoesNotExist as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(error))
-    return account
+    if content is None:
+        return not_modified(etag)
+    return Response(
+        content, media_type=ORJSONResponse.media_type, headers=cache_headers(etag)
+    )
 
 
 @router.get(
@@ -68,11 +347,51 @@ async def get_account_by_number(
     response_model=list[Any],
 )
 async def get_accounts_by_company_id(
-    company_id: UUID4 = Query(..., description="Company ID"),
+    company_id: UUID4 = Path(..., description="Company ID"),
+    fields: Fields = Depends(),
+    if_none_match: IfNoneMatch = Depends(),
     auth_user: User = Depends(optional_sso_auth),
-) -> list[AccountResponse]:
-    accounts = await get_db_accounts_by_company_id(company_id=company_id)
-    return accounts
+) -> Response:
+    accounts, etag = await get_company_accounts(
+        company_id=company_id, fields=fields, if_none_match=if_none_match
+    )
+    if accounts is None:
+        return not_modified(etag)
+    return ORJSONResponse(accounts, headers=cache_headers(etag))
+
+
+@router.post(
+    "/company-ids",
+    summary="Get accounts lists of many companies",
+    response_model=dict[str, list[Any]],
+    responses={
+        status.HTTP_200_OK: {
+            "content": {EXPORT_MEDIA_TYPES[ExportFormat.ndjson]: {}},
+            "description": "Accounts by company ID, or an NDJSON stream"
+            " (a line per company) if `stream` is set",
+        }
+    },
+)
+async def get_accounts_by_company_ids(
+    companies: AccountsByCompaniesDTO = Body(...),
+    stream: bool = Query(
+        False,
+        description='NDJSON stream, a line per company: {"company_id", "accounts"}',
+    ),
+    fields: Fields = Depends(),
+    auth_user: User = Depends(optional_sso_auth),
+) -> Union[ORJSONResponse, StreamingResponse]:
+    if stream:
+        return StreamingResponse(
+            stream_accounts_by_company_ids(
+                company_ids=companies.company_ids, fields=fields
+            ),
+            media_type=EXPORT_MEDIA_TYPES[ExportFormat.ndjson],
+        )
+    accounts = await get_db_accounts_by_company_ids(
+        company_ids=companies.company_ids, fields=fields
+    )
+    return ORJSONResponse(accounts)
 
 
 @router.get(
@@ -82,10 +401,18 @@ async def get_accounts_by_company_id(
 )
 async def get_account(
     account_id: UUID4 = Path(...),
+    fields: Fields = Depends(),
+    if_none_match: IfNoneMatch = Depends(),
     auth_user: User = Depends(optional_sso_auth),
-) -> AccountResponse:
+) -> Response:
     try:
-        account = await get_db_account_by_id(account_id=account_id)
+        content, etag = await get_account_json_by_id(
+            account_id=account_id, fields=fields, if_none_match=if_none_match
+        )
     except EntityDoesNotExist as error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(error))
-    return account
+    if content is None:
+        return not_modified(etag)
+    return Response(
+        content, media_type=ORJSONResponse.media_type, headers=cache_headers(etag)
+    )
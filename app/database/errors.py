@@ -16,3 +16,7 @@ class ConflictWhenDelete(Exception):
 
 class ResponsePageNotExist(Exception):
     """Raised when requested page was not found in query results."""
+
+
+class InvalidPageCursor(Exception):
+    """Raised when page cursor can not be decoded or does not match the query sort parameters."""
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy.engine import URL
+
+logger = logging.getLogger("app")
+
+# channel of the notify_*_change() triggers
+CHANGES_CHANNEL = "changes"
+
+
+class ChangeListener:
+    """
+    LISTEN on a Postgres channel on a dedicated connection (not from the pool) and
+    pass the decoded JSON payloads to the callbacks.
+    Notifications sent while disconnected are lost: reset callbacks are called on
+    every (re)connect, e.g. to drop caches that could have missed an eviction.
+    """
+
+    def __init__(
+        self,
+        url: URL,
+        channel: str = CHANGES_CHANNEL,
+        reconnect_delay: float = 1.0,
+        keepalive_interval: float = 10.0,
+    ):
+        # asyncpg takes a plain libpq URL, without the SQLAlchemy driver name
+        self.dsn = url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.keepalive_interval = keepalive_interval
+        self.connected = asyncio.Event()
+        self._callbacks: list[Callable[[dict], None]] = []
+        self._reset_callbacks: list[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_callback(self, callback: Callable[[dict], None]) -> None:
+        self._callbacks.append(callback)
+
+    def add_reset_callback(self, callback: Callable[[], None]) -> None:
+        self._reset_callbacks.append(callback)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _notify(self, connection, pid, channel, payload) -> None:
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Invalid {channel} notification payload: {payload}")
+            return
+        for callback in self._callbacks:
+            try:
+                callback(change)
+            except Exception:
+                logger.exception(f"{channel} notification callback failed")
+
+    def _reset(self) -> None:
+        for callback in self._reset_callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception(f"{self.channel} reset callback failed")
+
+    async def _run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(self.channel, self._notify)
+                self._reset()
+                self.connected.set()
+                logger.debug(f"Listening on '{self.channel}'")
+                # a dead peer is noticed by the keepalive query only
+                while not connection.is_closed():
+                    await asyncio.sleep(self.keepalive_interval)
+                    await connection.execute(
+                        "select 1", timeout=self.keepalive_interval
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Listener on '{self.channel}' disconnected: {error}")
+            finally:
+                self.connected.clear()
+                if connection is not None:
+                    connection.terminate()
+            await asyncio.sleep(self.reconnect_delay)
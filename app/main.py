@@ -12,7 +12,11 @@ from starlette_exporter import PrometheusMiddleware, handle_metrics
 from . import version
 from .api.errors import http422_error_handler, http_error_handler
 from .api.routes import accounts, health, reports
+from .database.listener import ChangeListener
 from .database.session import async_engine
+from .services.accounts import accounts_cache, evict_changed_accounts
+from .services.auth_service import PrivateAuthService
+from .services.events import ChangeBroadcaster
 from .settings import app_settings
 
 logger = logging.getLogger("app")
@@ -29,12 +33,31 @@ def create_start_app_handler(application: FastAPI) -> Callable:
         logger.debug(f"Connecting to {dsn}")
         # logger.debug("Connection established.")
 
+        PrivateAuthService.start()
+
+        if app_settings.DB_LISTEN_CHANGES:
+            listener = ChangeListener(async_engine.url)
+            listener.add_callback(evict_changed_accounts)
+            listener.add_reset_callback(accounts_cache.clear)
+            # account events streams (SSE) of this worker share the connection
+            broadcaster = ChangeBroadcaster(app_settings.ACCOUNTS_EVENTS_QUEUE_SIZE)
+            listener.add_callback(broadcaster.publish)
+            listener.add_reset_callback(broadcaster.reset)
+            listener.start()
+            application.state.change_listener = listener
+            application.state.change_broadcaster = broadcaster
+
     return start_app
 
 
 def create_stop_app_handler(application: FastAPI) -> Callable:
     async def stop_app() -> None:
         logger.debug("Shutting down...")
+        listener = getattr(application.state, "change_listener", None)
+        if listener is not None:
+            await listener.stop()
+            application.state.change_broadcaster.reset()
+        await PrivateAuthService.aclose()
         # logger.debug("Closing connections to database")
         # logger.debug("Connection closed")
 
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, String, text
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Index, String, text
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.declarative import declarative_base
@@ -17,6 +17,44 @@ Base = declarative_base()
 
 class AccountDB(Base):
     __tablename__ = "accounts"
+    __table_args__ = (
+        # list sort (AccountsSort + id tiebreaker), `modified` range filters and the
+        # change feed (archived accounts included)
+        Index("ix_accounts_modified_id", "modified", "id"),
+        Index(
+            "ix_accounts_created_id",
+            "created",
+            "id",
+            postgresql_where=text("not archived"),
+        ),
+        Index(
+            "ix_accounts_company_id",
+            "company_id",
+            postgresql_where=text("not archived"),
+        ),
+        # like/ilike on the account number
+        Index(
+            "ix_accounts_account_trgm",
+            "account",
+            postgresql_using="gin",
+            postgresql_ops={"account": "gin_trgm_ops"},
+        ),
+        # only one account (account_type_1) per company in a given currency
+        Index(
+            "ux_accounts_company_currency",
+            "company_id",
+            "currency",
+            unique=True,
+            postgresql_where=text("type = 'account_type_1' and not archived"),
+        ),
+        # containment (`@>`) filters on additional_info keys
+        Index(
+            "ix_accounts_additional_info",
+            "additional_info",
+            postgresql_using="gin",
+            postgresql_ops={"additional_info": "jsonb_path_ops"},
+        ),
+    )
     id: Optional[UUID] = Column(
         postgresql.UUID(as_uuid=True),
         primary_key=True,
@@ -57,3 +95,19 @@ class AccountDB(Base):
             f" company_id='{str(self.company_id)}';"
             f" company_name='{self.company_name}';"
         )
+
+
+# read path projection: plain columns, the company name from a join on companies
+COMPANY_NAME_COLUMN = CompanyDB.name.label("company_name")
+
+ACCOUNT_COLUMNS = (
+    AccountDB.id,
+    AccountDB.type,
+    AccountDB.currency,
+    AccountDB.account,
+    AccountDB.company_id,
+    COMPANY_NAME_COLUMN,
+    AccountDB.additional_info,
+    AccountDB.created,
+    AccountDB.modified,
+)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import Column, DateTime, String, text
+from sqlalchemy import Column, DateTime, Index, String, text
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -11,6 +11,15 @@ Base = declarative_base()
 
 class CompanyDB(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        # like/ilike on the company name (`client` filter)
+        Index(
+            "ix_companies_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: UUID = Column(
         postgresql.UUID(as_uuid=True),
@@ -1,36 +1,205 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Callable, Optional
+import base64
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Generic, Optional, Sequence, TypeVar
+from uuid import UUID
 
 from fastapi import Query
-from fastapi_pagination import Params, create_page, resolve_params
-from fastapi_pagination.bases import AbstractPage, AbstractParams
-from fastapi_pagination.ext.sqlalchemy import paginate_query
-from sqlalchemy import func, select
+from fastapi_pagination import Page, Params, resolve_params
+from fastapi_pagination.bases import AbstractParams
+from pydantic import conint
+from pydantic.generics import GenericModel
+from sqlalchemy import and_, func, or_, select, tuple_
+
+from app.database.errors import InvalidPageCursor
+from app.database.explain import estimate_rows
+from app.settings import app_settings
+from app.types import TotalMode
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.sql import Select
 
+T = TypeVar("T")
+
+# keyset: list of (model column, descending) pairs, the last one must be unique (tiebreaker)
+Keyset = Sequence[tuple[Any, bool]]
+
 
 class ParamsEx(Params):
     size: int = Query(50, ge=1, description="Page size")
 
 
+class PageEx(Page[T], Generic[T]):
+    total: Optional[conint(ge=0)]  # type: ignore
+    total_estimated: bool = False
+    has_next: bool = False
+
+    __params_type__ = ParamsEx
+
+
+class CursorPage(GenericModel, Generic[T]):
+    items: Sequence[T]
+    size: conint(ge=1)  # type: ignore
+    next_cursor: Optional[str] = None
+
+
+def _keyset_signature(keyset: Keyset) -> str:
+    return ",".join(f"{c.key}:{'desc' if d else 'asc'}" for c, d in keyset)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is UUID:
+        return UUID(value)
+    return value
+
+
+def encode_cursor(keyset: Keyset, values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        [_keyset_signature(keyset), [_encode_value(v) for v in values]],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keyset: Keyset, cursor: str) -> list:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        signature, values = json.loads(payload)
+        if signature != _keyset_signature(keyset) or len(values) != len(keyset):
+            raise ValueError("cursor does not match the sort parameters")
+        return [_decode_value(c, v) for (c, _), v in zip(keyset, values)]
+    except (ValueError, TypeError) as error:
+        raise InvalidPageCursor(f"Invalid page cursor: {error}")
+
+
+def _keyset_predicate(keyset: Keyset, values: Sequence[Any]):
+    columns = [c for c, _ in keyset]
+    directions = {d for _, d in keyset}
+
+    # uniform direction: a single row-value comparison, served by a composite index
+    if len(directions) == 1:
+        if directions.pop():
+            return tuple_(*columns) < tuple_(*values)
+        return tuple_(*columns) > tuple_(*values)
+
+    # mixed directions: (c1 > v1) OR (c1 = v1 AND c2 < v2) OR ...
+    clauses = []
+    for i, (column, descending) in enumerate(keyset):
+        equals = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(
+            and_(*equals, column < values[i] if descending else column > values[i])
+        )
+    return or_(*clauses)
+
+
 async def paginate(
     session: AsyncSession,
     query: Select,
     params: Optional[AbstractParams] = None,
     mapping_func: Callable = None,
-) -> AbstractPage:
+    include_total: bool = True,
+    total_mode: TotalMode = TotalMode.exact,
+) -> PageEx:
+    """
+    Page and total in a single round trip: the total is a `count(*) OVER ()` window
+    column of the page query. With include_total=False counting is skipped entirely
+    and has_next is detected by fetching one extra row.
+    With TotalMode.estimate the total is the planner row estimate (EXPLAIN), unless
+    it is below PAGINATION_ESTIMATE_THRESHOLD, then it is counted exactly.
+    """
     params = resolve_params(params)
+    raw_params = params.to_raw_params()
+
+    total = None
+    total_estimated = False
+    if include_total and total_mode == TotalMode.estimate:
+        estimate = await estimate_rows(session, query)
+        if estimate >= app_settings.PAGINATION_ESTIMATE_THRESHOLD:
+            total, total_estimated = estimate, True
+
+    if include_total and not total_estimated:
+        stmt = query.add_columns(func.count().over().label("_total"))
+        results = await session.execute(
+            stmt.limit(raw_params.limit).offset(raw_params.offset)
+        )
+        rows = results.all()
+        if rows:
+            total = rows[0]._mapping["_total"]
+        elif raw_params.offset:
+            # page past the end: the window has no rows to report the total on
+            total = await session.scalar(
+                select(func.count()).select_from(query.subquery())
+            )
+        else:
+            total = 0
+        has_next = raw_params.offset + len(rows) < total
+    else:
+        results = await session.execute(
+            query.limit(raw_params.limit + 1).offset(raw_params.offset)
+        )
+        rows = results.all()
+        has_next = len(rows) > raw_params.limit
+        rows = rows[: raw_params.limit]
+
+    if mapping_func:
+        items = [mapping_func(i) for i in rows]
+    else:
+        items = [i[0] for i in rows]
+
+    return PageEx(
+        items=items,
+        total=total,
+        total_estimated=total_estimated,
+        page=params.page,
+        size=params.size,
+        has_next=has_next,
+    )
+
+
+async def paginate_keyset(
+    session: AsyncSession,
+    query: Select,
+    keyset: Keyset,
+    size: int,
+    cursor: Optional[str] = None,
+    mapping_func: Callable = None,
+) -> CursorPage:
+    """
+    Keyset (seek) pagination: the cost of a page does not depend on its depth.
+    The query must not be ordered, the order is defined by the keyset.
+    """
+    keys = [c.label(f"_keyset_{i}") for i, (c, _) in enumerate(keyset)]
+    stmt = query.add_columns(*keys)
+    if cursor:
+        stmt = stmt.filter(_keyset_predicate(keyset, decode_cursor(keyset, cursor)))
+    stmt = stmt.order_by(*[c.desc() if d else c.asc() for c, d in keyset])
+    # fetch one extra row to know whether there is a next page
+    results = await session.execute(stmt.limit(size + 1))
+    rows = results.all()
 
-    total = await session.scalar(select(func.count()).select_from(query.subquery()))  # type: ignore
-    results = await session.execute(paginate_query(query, params))
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(keyset, [last[k.name] for k in keys])
 
     if mapping_func:
-        items = [mapping_func(i) for i in results.unique().all()]
+        items = [mapping_func(i) for i in rows]
     else:
-        items = results.scalars().unique().all()
+        items = [i[0] for i in rows]
 
-    return create_page(items, total, params)
+    return CursorPage(items=items, size=size, next_cursor=next_cursor)
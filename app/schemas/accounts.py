@@ -1,6 +1,9 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import UUID4, BaseModel, Field, root_validator
+
+from app.settings import app_settings
+from app.types import BankAccountNumber
 
 
 class BankAccountInfo(BaseModel):
@@ -10,3 +13,30 @@ class BankAccountInfo(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class AccountLookupDTO(BaseModel):
+    ids: list[UUID4] = Field(
+        default_factory=list,
+        max_items=app_settings.ACCOUNTS_LOOKUP_MAX_SIZE,
+        description="Account IDs",
+    )
+    numbers: list[BankAccountNumber] = Field(
+        default_factory=list,
+        max_items=app_settings.ACCOUNTS_LOOKUP_MAX_SIZE,
+        description="Account numbers",
+    )
+
+    @root_validator
+    def not_empty(cls, values):
+        if not values.get("ids") and not values.get("numbers"):
+            raise ValueError("Account IDs or numbers are required")
+        return values
+
+
+class AccountsByCompaniesDTO(BaseModel):
+    company_ids: list[UUID4] = Field(
+        min_items=1,
+        max_items=app_settings.ACCOUNTS_COMPANIES_MAX_SIZE,
+        description="Company IDs",
+    )
@@ -1,10 +1,20 @@
 from datetime import datetime
-from typing import TypeVar
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Optional, Type, TypeVar
+from uuid import UUID
 
 from pydantic import UUID4, BaseModel, Field
+from pydantic.fields import ModelField
+from pydantic.utils import lenient_issubclass
 
 from app.schemas.accounts import BankAccountInfo
-from app.types import AccountType, CurrencyNumericCode
+from app.types import (
+    AccountCreateStatus,
+    AccountType,
+    BankAccountNumber,
+    CurrencyNumericCode,
+)
 
 
 class AccountResponseMixin(BaseModel):
@@ -52,6 +62,33 @@ class AccountType4Response(
     pass
 
 
+class AccountBulkItemResponse(BaseModel):
+    index: int = Field(description="Index of the account in the request")
+    status: AccountCreateStatus = Field(description="Result")
+    id: Optional[UUID4] = Field(
+        None, description="Created account ID, or ID of the existing account"
+    )
+    detail: Optional[str] = Field(None, description="Conflict reason")
+
+
+class AccountLookupResponse(BaseModel):
+    ids: dict[str, Optional[Any]] = Field(
+        description="Accounts by requested ID, null if not found"
+    )
+    numbers: dict[str, Optional[Any]] = Field(
+        description="Accounts by requested number, null if not found"
+    )
+
+
+class AccountChangesResponse(BaseModel):
+    items: list[Any] = Field(
+        description="Changed accounts ordered by (modified, id): archived accounts"
+        " are tombstones (id, company_id, archived, modified)"
+    )
+    since: str = Field(description="Watermark to pass as `since` in the next poll")
+    has_more: bool = Field(description="More changes are available after this batch")
+
+
 AccountResponse = TypeVar(
     "AccountResponse",
     AccountType1Response,
@@ -82,3 +119,84 @@ def get_response_model_by_type(
 def build_account_response_by_type(account) -> AccountResponse:
     model = get_response_model_by_type(account.type)
     return model.from_orm(account)
+
+
+def _compile_field(field: ModelField) -> Callable[[Any], Any]:
+    field_type = field.type_
+    if lenient_issubclass(field_type, BaseModel):
+        convert = _compile_model(field_type, by_key=True)
+    elif lenient_issubclass(field_type, Enum):
+        convert = lambda v: field_type(v).value  # noqa: E731
+    elif lenient_issubclass(field_type, UUID):
+        convert = str
+    elif lenient_issubclass(field_type, datetime):
+        convert = datetime.isoformat
+    else:
+        return lambda v: v
+    return lambda v: None if v is None else convert(v)
+
+
+def _compile_model(
+    model: Type[BaseModel],
+    by_key: bool = False,
+    fields: Optional[frozenset] = None,
+    extra: Optional[Type[BaseModel]] = None,
+) -> Callable:
+    """
+    Serializer of a response model: object (or dict) -> JSON-ready dict, equal to
+    jsonable_encoder(model.from_orm(object)) but without validation and copying.
+    fields: sparse fieldset (model and extra model fields), all model fields if None
+    """
+    model_fields = list(model.__fields__.items())
+    if extra is not None:
+        model_fields.extend(extra.__fields__.items())
+    converters = tuple(
+        (name, _compile_field(field))
+        for name, field in model_fields
+        if fields is None or name in fields
+    )
+
+    if by_key:
+
+        def serialize(obj) -> dict:
+            return {name: convert(obj.get(name)) for name, convert in converters}
+
+    else:
+
+        def serialize(obj) -> dict:
+            return {name: convert(getattr(obj, name)) for name, convert in converters}
+
+    return serialize
+
+
+class AccountSparseFields(BaseModel):
+    """Fields returned only when requested in a sparse fieldset"""
+
+    account: BankAccountNumber = Field(description="IBAN or Account No.")
+
+
+ACCOUNT_SERIALIZERS = {
+    account_type: _compile_model(get_response_model_by_type(account_type))
+    for account_type in AccountType
+}
+
+
+@lru_cache()
+def get_account_serializer(
+    account_type: AccountType, fields: Optional[frozenset] = None
+) -> Callable:
+    if fields is None:
+        return ACCOUNT_SERIALIZERS[account_type]
+    return _compile_model(
+        get_response_model_by_type(account_type),
+        fields=fields,
+        extra=AccountSparseFields,
+    )
+
+
+def serialize_account(account, fields: Optional[frozenset] = None) -> dict:
+    """
+    Account entity or row -> JSON-ready dict of its AccountType response schema,
+    restricted to the sparse fieldset if given
+    """
+    return get_account_serializer(AccountType(account.type), fields)(account)
@@ -1,130 +1,825 @@
+import hashlib
+import json
 import logging
-from typing import TYPE_CHECKING
+from datetime import datetime, timedelta
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Optional,
+    Sequence,
+    Union,
+)
 from uuid import UUID
 
 if TYPE_CHECKING:
     from app.api.dependencies.sort import AccountsSort
-    from app.api.dependencies import Filters
+    from app.api.dependencies import Fields, Filters
+    from app.api.dependencies.conditional import IfNoneMatch
 
+import orjson
 from fastapi_async_sqlalchemy import db
-from sqlalchemy import not_, select
+from sqlalchemy import (
+    String,
+    Text,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    func,
+    literal,
+    not_,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
 
 from app.database.errors import ConflictWhenInsert, EntityDoesNotExist
-from app.models.accounts import AccountDB
+from app.database.session import async_engine
+from app.models.accounts import ACCOUNT_COLUMNS, COMPANY_NAME_COLUMN, AccountDB
 from app.models.companies import CompanyDB
-from app.paginate_patch import ParamsEx, paginate
+from app.paginate_patch import (
+    CursorPage,
+    PageEx,
+    ParamsEx,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+    paginate_keyset,
+)
 from app.schemas.create.accounts import AccountCreateDTO
-from app.schemas.response.accounts import AccountResponse, get_response_model_by_type
-from app.types import AccountType, BankAccountNumber
+from app.schemas.response.accounts import serialize_account
+from app.services.cache import SingleFlight, TTLCache
+from app.settings import app_settings
+from app.types import AccountCreateStatus, AccountType, BankAccountNumber, TotalMode
 
 logger = logging.getLogger("app")
 
 
-def map_raw_account(account) -> AccountResponse:
-    model = get_response_model_by_type(account[0].type)
-    result = model.from_orm(account[0])
-    result.balance = account["balance"]
-    result.balance_date = account["balance_date"]
-    return result
+# (serialized JSON, ETag) of account lookups, tagged with ("account", id) and ("company", company_id)
+accounts_cache = TTLCache(
+    "accounts",
+    maxsize=app_settings.ACCOUNTS_CACHE_SIZE,
+    ttl=app_settings.ACCOUNTS_CACHE_TTL,
+)
+
+# identical concurrent list queries share one database round trip, on its own
+# connection: the call outlives a cancelled caller and its request db.session
+accounts_flight = SingleFlight("accounts")
+
+
+def evict_changed_accounts(change: dict) -> None:
+    """
+    Evicts cached lookups on a `changes` notification: a batch of the rows changed
+    by a statement (notify_*_changes triggers), null if there are too many to list
+    """
+    tag = {"accounts": "account", "companies": "company"}.get(change["table"])
+    if tag is None:
+        return
+    if change["rows"] is None:
+        accounts_cache.clear()
+        return
+    for row in change["rows"]:
+        accounts_cache.invalidate_tag((tag, UUID(row["id"])))
+
+
+def select_account_rows(columns: Optional[Sequence] = None):
+    """
+    Read path: plain account columns as compact Row tuples. Unlike select(AccountDB)
+    no ORM entities, no joined eager loading and no identity map bookkeeping.
+    columns: projection (sparse fieldset), companies are joined only for the company name
+    """
+    if columns is None:
+        columns = ACCOUNT_COLUMNS
+    stmt = select(*columns).select_from(AccountDB)
+    if any(c is COMPANY_NAME_COLUMN for c in columns):
+        stmt = stmt.join(CompanyDB, CompanyDB.id == AccountDB.company_id)
+    return stmt
+
+
+def filter_accounts(filters: "Filters", columns: Optional[Sequence] = None):
+    """Active accounts matching the filters"""
+    stmt = select_account_rows(columns).filter(not_(AccountDB.archived))
+    return filters.apply(stmt)
+
+
+def map_raw_account(account, fields: Optional[frozenset] = None) -> dict:
+    return serialize_account(account, fields)
+
+
+def _projection(fields: Optional["Fields"]) -> tuple[Optional[list], Callable]:
+    if fields is None or fields.names is None:
+        return None, map_raw_account
+    return fields.columns(), partial(map_raw_account, fields=fields.names)
+
+
+def _fields_key(fields: Optional["Fields"]) -> Optional[frozenset]:
+    return fields.names if fields is not None else None
 
 
 async def get_accounts_page(
     *,
     page: int = 1,
     size: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    total_mode: TotalMode = TotalMode.exact,
     filters: "Filters",
     sort: "AccountsSort",
-):
-    stmt = select(AccountDB).filter(not_(AccountDB.archived))
-    stmt = filters.apply(stmt)
-    stmt = sort.apply(stmt)
-
-    accounts_page = await paginate(
-        db.session,
-        stmt,
-        ParamsEx(page=page, size=size),
-        mapping_func=map_raw_account,
+    fields: Optional["Fields"] = None,
+    if_none_match: Optional["IfNoneMatch"] = None,
+) -> tuple[Optional[Union[PageEx, CursorPage]], str]:
+    """
+    (page, ETag): the ETag is derived from the accounts version under the filters
+    and the page parameters, the page is None (not read) if it matches
+    `if_none_match`. Raises InvalidPageCursor before any query.
+    """
+    if cursor:
+        decode_cursor(sort.get_keyset(), cursor)
+    key = (
+        "page",
+        filters.raw,
+        str(sort),
+        str(fields),
+        page,
+        size,
+        cursor,
+        include_total,
+        total_mode,
+    )
+    version = await accounts_flight.do(
+        ("version", filters.raw), _get_accounts_version, filters.apply
     )
+    etag = make_etag(version, key)
+    if if_none_match and if_none_match.matches(etag):
+        return None, etag
+    accounts_page = await accounts_flight.do(
+        key,
+        _get_accounts_page,
+        page=page,
+        size=size,
+        cursor=cursor,
+        include_total=include_total,
+        total_mode=total_mode,
+        filters=filters,
+        sort=sort,
+        fields=fields,
+    )
+    return accounts_page, etag
+
+
+async def _get_accounts_page(
+    *,
+    page: int,
+    size: int,
+    cursor: Optional[str],
+    include_total: bool,
+    total_mode: TotalMode,
+    filters: "Filters",
+    sort: "AccountsSort",
+    fields: Optional["Fields"],
+) -> Union[PageEx, CursorPage]:
+    columns, mapping_func = _projection(fields)
+    stmt = filter_accounts(filters, columns)
+
+    async with async_engine.connect() as connection:
+        if cursor is not None:
+            return await paginate_keyset(
+                connection,
+                stmt,
+                sort.get_keyset(),
+                size,
+                cursor,
+                mapping_func=mapping_func,
+            )
+
+        stmt = sort.apply(stmt)
+
+        accounts_page = await paginate(
+            connection,
+            stmt,
+            ParamsEx(page=page, size=size),
+            mapping_func=mapping_func,
+            include_total=include_total,
+            total_mode=total_mode,
+        )
     return accounts_page
 
 
-async def get_db_account_by_id(account_id: UUID, archived: bool = False) -> AccountDB:
-    stmt = select(AccountDB).filter(AccountDB.id == account_id)
+async def stream_accounts(
+    *,
+    filters: "Filters",
+    sort: "AccountsSort",
+    partition_size: int = 1000,
+) -> AsyncIterator[list]:
+    """
+    Filtered and sorted accounts as partitions of Core rows read from a server-side cursor.
+    Runs on its own connection: a streaming response outlives the request db.session.
+    """
+    stmt = sort.apply(filter_accounts(filters))
+
+    async with async_engine.connect() as connection:
+        result = await connection.stream(
+            stmt.execution_options(yield_per=partition_size)
+        )
+        async for partition in result.partitions(partition_size):
+            yield partition
+
+
+async def get_db_account_by_id(
+    account_id: UUID, archived: bool = False, fields: Optional["Fields"] = None
+) -> Row:
+    columns, _ = _projection(fields)
+    stmt = select_account_rows(columns).filter(AccountDB.id == account_id)
     if not archived:
         stmt = stmt.filter(not_(AccountDB.archived))
     result = await db.session.execute(stmt)
-    account = result.scalar()
+    account = result.first()
     if not account:
         raise EntityDoesNotExist(f"Account with id '{account_id}' does not exists")
     return account
 
 
-async def get_db_account_by_number(number: BankAccountNumber) -> AccountResponse:
-    stmt = select(AccountDB).filter(
+async def get_db_account_by_number(
+    number: BankAccountNumber, fields: Optional["Fields"] = None
+) -> Row:
+    columns, _ = _projection(fields)
+    stmt = select_account_rows(columns).filter(
         AccountDB.account == number, not_(AccountDB.archived)
     )
     result = await db.session.execute(stmt)
-    account = result.scalars().first()
+    account = result.first()
     if not account:
         raise EntityDoesNotExist(f"Account with number '{number}' does not exists")
-    return map_raw_account(account)
+    return account
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag: digest of the values the representation is built from"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+async def _get_accounts_version(where: Callable) -> tuple:
+    """
+    What a list of accounts changes with: their count (an archived account leaves
+    it) and latest account and company changes. One aggregate query, no rows read.
+    """
+    stmt = (
+        select(func.count(), func.max(AccountDB.modified), func.max(CompanyDB.modified))
+        .select_from(AccountDB)
+        .join(CompanyDB, CompanyDB.id == AccountDB.company_id)
+        .filter(not_(AccountDB.archived))
+    )
+    async with async_engine.connect() as connection:
+        result = await connection.execute(where(stmt))
+    return tuple(result.one())
+
+
+def _account_etag(account: Row, fields: Optional[frozenset]) -> str:
+    # every account column change sets `modified`, the company name comes from the join
+    return make_etag(
+        account.id,
+        account.modified,
+        account.company_name,
+        sorted(fields) if fields is not None else None,
+    )
+
+
+async def _get_account_json(
+    key: tuple,
+    fetch: Callable[[], Awaitable[Row]],
+    fields: Optional[frozenset],
+    if_none_match: Optional["IfNoneMatch"],
+) -> tuple[Optional[bytes], str]:
+    cached = accounts_cache.get(key)
+    if cached is not None:
+        content, etag = cached
+    else:
+        account = await fetch()
+        etag = _account_etag(account, fields)
+        if if_none_match and if_none_match.matches(etag):
+            return None, etag
+        content = orjson.dumps(serialize_account(account, fields))
+        accounts_cache.set(
+            key,
+            (content, etag),
+            tags=(("account", account.id), ("company", account.company_id)),
+        )
+    if if_none_match and if_none_match.matches(etag):
+        return None, etag
+    return content, etag
+
+
+async def get_account_json_by_id(
+    account_id: UUID,
+    fields: Optional["Fields"] = None,
+    if_none_match: Optional["IfNoneMatch"] = None,
+) -> tuple[Optional[bytes], str]:
+    """
+    Read-through cached get_db_account_by_id: (serialized response body, ETag), the
+    body is None (not serialized) if the ETag matches `if_none_match`.
+    The full row is read on a miss: its id and company_id tag the cache entry.
+    """
+    names = _fields_key(fields)
+    return await _get_account_json(
+        ("id", account_id, names),
+        partial(get_db_account_by_id, account_id),
+        names,
+        if_none_match,
+    )
+
+
+async def get_account_json_by_number(
+    number: BankAccountNumber,
+    fields: Optional["Fields"] = None,
+    if_none_match: Optional["IfNoneMatch"] = None,
+) -> tuple[Optional[bytes], str]:
+    """Read-through cached get_db_account_by_number, as get_account_json_by_id"""
+    names = _fields_key(fields)
+    return await _get_account_json(
+        ("number", number, names),
+        partial(get_db_account_by_number, number),
+        names,
+        if_none_match,
+    )
+
+
+async def lookup_db_accounts(
+    *,
+    ids: Sequence[UUID],
+    numbers: Sequence[str],
+    fields: Optional["Fields"] = None,
+) -> dict:
+    """
+    Accounts by IDs and by numbers in one query (`= ANY(array)`, one parameter per
+    list): {"ids": {id: account}, "numbers": {number: account}}, None if not found
+    """
+    columns, mapping_func = _projection(fields)
+    number_column = AccountDB.account.label("lookup_number")
+    stmt = select_account_rows([*(columns or ACCOUNT_COLUMNS), number_column]).filter(
+        not_(AccountDB.archived),
+        or_(
+            AccountDB.id == any_(_array(AccountDB.id.type, ids)),
+            AccountDB.account == any_(_array(AccountDB.account.type, numbers)),
+        ),
+    )
+    result = await db.session.execute(stmt)
+
+    by_id, by_number = {}, {}
+    for row in result:
+        account = mapping_func(row)
+        by_id[row.id] = account
+        by_number[row._mapping["lookup_number"]] = account
+    return {
+        "ids": {str(i): by_id.get(i) for i in ids},
+        "numbers": {n: by_number.get(n) for n in numbers},
+    }
 
 
 async def get_db_accounts_by_company_id(
-    *, company_id: UUID, _session=None
-) -> list[AccountResponse]:
-    if not _session:
-        _session = db.session
+    *, company_id: UUID, fields: Optional["Fields"] = None, _session=None
+) -> list[dict]:
+    if _session:
+        return await _get_db_accounts_by_company_id(company_id, fields, _session)
+    return await accounts_flight.do(
+        ("company", company_id, str(fields)),
+        _get_db_accounts_by_company_id,
+        company_id,
+        fields,
+    )
+
 
-    stmt = select(AccountDB).filter(
+async def _get_db_accounts_by_company_id(
+    company_id: UUID, fields: Optional["Fields"], _session=None
+) -> list[dict]:
+    if _session is None:
+        async with async_engine.connect() as connection:
+            return await _get_db_accounts_by_company_id(company_id, fields, connection)
+    columns, mapping_func = _projection(fields)
+    stmt = select_account_rows(columns).filter(
         AccountDB.company_id == company_id, not_(AccountDB.archived)
     )
     result = await _session.execute(stmt)
-    accounts = [map_raw_account(a) for a in result.all()]
-    return accounts
+    return [mapping_func(a) for a in result.all()]
+
+
+async def get_company_accounts(
+    *,
+    company_id: UUID,
+    fields: Optional["Fields"] = None,
+    if_none_match: Optional["IfNoneMatch"] = None,
+) -> tuple[Optional[list[dict]], str]:
+    """
+    (active accounts of the company, ETag) as get_accounts_page: the accounts are
+    None (not read) if the ETag matches `if_none_match`
+    """
+    version = await accounts_flight.do(
+        ("version", "company", company_id),
+        _get_accounts_version,
+        lambda stmt: stmt.filter(AccountDB.company_id == company_id),
+    )
+    etag = make_etag(version, str(fields))
+    if if_none_match and if_none_match.matches(etag):
+        return None, etag
+    return (
+        await get_db_accounts_by_company_id(company_id=company_id, fields=fields),
+        etag,
+    )
+
 
+def _select_by_company_ids(company_ids: Sequence[UUID], columns: Optional[list]):
+    """
+    Active accounts of the companies, one `company_id = ANY(array)` index scan,
+    ordered by company (groups are contiguous)
+    """
+    group_column = AccountDB.company_id.label("group_company_id")
+    return (
+        select_account_rows([*(columns or ACCOUNT_COLUMNS), group_column])
+        .filter(
+            AccountDB.company_id
+            == any_(_array(AccountDB.company_id.type, company_ids)),
+            not_(AccountDB.archived),
+        )
+        .order_by(AccountDB.company_id, AccountDB.id)
+    )
+
+
+async def get_db_accounts_by_company_ids(
+    *, company_ids: Sequence[UUID], fields: Optional["Fields"] = None
+) -> dict[str, list[dict]]:
+    """Accounts of many companies in one query: {company_id: [account]}"""
+    columns, mapping_func = _projection(fields)
+    result = await db.session.execute(_select_by_company_ids(company_ids, columns))
+
+    groups: dict[str, list[dict]] = {str(c): [] for c in company_ids}
+    for row in result:
+        groups[str(row.group_company_id)].append(mapping_func(row))
+    return groups
+
+
+async def stream_accounts_by_company_ids(
+    *,
+    company_ids: Sequence[UUID],
+    fields: Optional["Fields"] = None,
+    partition_size: int = 1000,
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON stream of get_db_accounts_by_company_ids, a line per company:
+    {"company_id": ..., "accounts": [...]}. Only one company is held in memory.
+    Companies without accounts come last.
+    Runs on its own connection: a streaming response outlives the request db.session.
+    """
+    columns, mapping_func = _projection(fields)
+    stmt = _select_by_company_ids(company_ids, columns)
+
+    def line(company_id, accounts) -> bytes:
+        # str: orjson does not serialize the asyncpg UUID subclass
+        data = {"company_id": str(company_id), "accounts": accounts}
+        return orjson.dumps(data) + b"\n"
+
+    pending = set(company_ids)
+    company_id, accounts = None, []
+    async with async_engine.connect() as connection:
+        result = await connection.stream(
+            stmt.execution_options(yield_per=partition_size)
+        )
+        async for partition in result.partitions(partition_size):
+            chunk = []
+            for row in partition:
+                if row.group_company_id != company_id:
+                    if company_id is not None:
+                        chunk.append(line(company_id, accounts))
+                    company_id, accounts = row.group_company_id, []
+                    pending.discard(company_id)
+                accounts.append(mapping_func(row))
+            if chunk:
+                yield b"".join(chunk)
+    if company_id is not None:
+        yield line(company_id, accounts)
+    for company_id in company_ids:
+        if company_id in pending:
+            pending.discard(company_id)
+            yield line(company_id, [])
+
+
+# change feed order and watermark: served by ix_accounts_modified_id (archived rows included)
+CHANGES_KEYSET = ((AccountDB.modified, False), (AccountDB.id, False))
+
+
+def _serialize_change(row) -> dict:
+    if row.archived:
+        # tombstone
+        return {
+            "id": str(row.id),
+            "company_id": str(row.company_id),
+            "archived": True,
+            "modified": row.modified.isoformat(),
+        }
+    return {**serialize_account(row), "archived": False}
+
+
+async def read_account_changes(
+    *, since: Optional[str], limit: int, lag: Optional[float] = None, _session=None
+) -> tuple[list[Row], Optional[str], bool]:
+    """
+    Accounts created, changed or archived after the `since` watermark (from the
+    beginning if empty), ordered by (modified, id): one range scan of the index.
+    Returns (rows, next watermark, has_more).
+    Rows changed less than `lag` (ACCOUNTS_CHANGES_LAG) seconds ago are left for the
+    next poll: `modified` is the transaction start time, a transaction still running
+    may commit rows older than the newest ones visible.
+    Raises InvalidPageCursor if the watermark can not be decoded.
+    """
+    if lag is None:
+        lag = app_settings.ACCOUNTS_CHANGES_LAG
+    stmt = (
+        select_account_rows([*ACCOUNT_COLUMNS, AccountDB.archived])
+        .order_by(*(c for c, _ in CHANGES_KEYSET))
+        .limit(limit + 1)
+    )
+    if lag > 0:
+        stmt = stmt.filter(AccountDB.modified < func.now() - timedelta(seconds=lag))
+    if since:
+        stmt = stmt.filter(
+            tuple_(*(c for c, _ in CHANGES_KEYSET))
+            > tuple_(*decode_cursor(CHANGES_KEYSET, since))
+        )
+    result = await (_session or db.session).execute(stmt)
+    rows = result.all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        since = change_watermark(rows[-1].modified, rows[-1].id)
+    return rows, since, has_more
+
+
+def change_watermark(modified: datetime, account_id: UUID) -> str:
+    return encode_cursor(CHANGES_KEYSET, [modified, account_id])
+
+
+async def get_account_changes(*, since: Optional[str], limit: int) -> dict:
+    """Change feed batch: read_account_changes serialized, tombstones for archived"""
+    rows, since, has_more = await read_account_changes(since=since, limit=limit)
+    return {
+        "items": [_serialize_change(row) for row in rows],
+        "since": since or "",
+        "has_more": has_more,
+    }
+
+
+async def create_account(account_dto: AccountCreateDTO) -> tuple[dict, bool]:
+    """
+    Company upsert and account insert in a single statement, returns (account, created).
+    Only one account per company in a given currency: enforced by the
+    ux_accounts_company_currency unique index, the existing account is returned.
+    """
+    stmt = (
+        postgresql.insert(AccountDB)
+        .values(**account_dto.dict(exclude={"company_name"}))
+        .on_conflict_do_nothing()
+        .returning(
+            *(c for c in ACCOUNT_COLUMNS if c is not COMPANY_NAME_COLUMN),
+            # typed: a bare parameter type can not be inferred in RETURNING
+            cast(literal(account_dto.company_name), String).label("company_name"),
+        )
+    )
+    if account_dto.company_id is not None:
+        company = _upsert_companies({account_dto.company_id: account_dto.company_name})
+        stmt = stmt.add_cte(company.cte("company"))
+
+    try:
+        result = await db.session.execute(stmt)
+        account = result.first()
+        await db.session.commit()
+    except IntegrityError as error:
+        logger.error(str(error))
+        raise ConflictWhenInsert(
+            f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {error}"  # noqa
+        )
+
+    # the company name may have been changed by the upsert
+    accounts_cache.invalidate_tag(("company", account_dto.company_id))
+
+    if account is not None:
+        logger.debug(f"Create new Account: {account.id} {account.account}")
+        return serialize_account(account), True
 
-async def create_account(account_dto: AccountCreateDTO) -> AccountDB:
     if account_dto.type == AccountType.account_type_1:
-        _accounts = await get_db_accounts_by_company_id(
-            company_id=account_dto.company_id
+        result = await db.session.execute(
+            select_account_rows().filter(
+                AccountDB.company_id == account_dto.company_id,
+                AccountDB.currency == account_dto.currency,
+                AccountDB.type == AccountType.account_type_1,
+                not_(AccountDB.archived),
+            )
         )
-    else:
-        _accounts = []
+        existing = result.first()
+        if existing is not None:
+            return serialize_account(existing), False
 
-    account = next(
-        (
-            a
-            for a in _accounts
-            if a.currency == account_dto.currency and a.type == account_dto.type
+    raise ConflictWhenInsert(
+        f"Account with number '{account_dto.account}' already exists"
+    )
+
+
+def _array(type_, values):
+    """Typed array parameter"""
+    return cast(
+        bindparam(None, list(values), type_=postgresql.ARRAY(type_)),
+        postgresql.ARRAY(type_),
+    )
+
+
+def _unnest(alias: str, columns: dict):
+    """
+    Rows of parallel arrays, `unnest(:c1, :c2, ...) AS alias(c1, c2, ...)`:
+    columns: {name: (type, values)}, one bind parameter per column whatever the row count
+    """
+    arrays = [_array(type_, values) for type_, values in columns.values()]
+    return func.unnest(*arrays).table_valued(*columns).render_derived(name=alias)
+
+
+def _upsert_companies(companies: dict):
+    """Insert or rename companies (id -> name), like session.merge(CompanyDB(...))"""
+    batch = _unnest(
+        "batch",
+        {
+            "id": (CompanyDB.id.type, companies.keys()),
+            "name": (String, companies.values()),
+        },
+    )
+    stmt = postgresql.insert(CompanyDB).from_select(
+        ["id", "name"], select(batch.c.id, batch.c.name)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[CompanyDB.id],
+        set_={"name": stmt.excluded.name},
+        # unchanged companies are not updated (no `modified` bump, no change notification)
+        where=CompanyDB.name.is_distinct_from(stmt.excluded.name),
+    )
+
+
+async def _existing_accounts_by_company_currency(keys: set) -> dict:
+    """(company_id, currency) -> id of the account_type_1 account"""
+    company_ids, currencies = zip(*keys)
+    batch = _unnest(
+        "batch",
+        {
+            "company_id": (AccountDB.company_id.type, company_ids),
+            "currency": (String, currencies),
+        },
+    )
+    stmt = (
+        select(AccountDB.id, AccountDB.company_id, AccountDB.currency)
+        .join(
+            batch,
+            and_(
+                AccountDB.company_id == batch.c.company_id,
+                AccountDB.currency == batch.c.currency,
+            ),
+        )
+        .filter(AccountDB.type == AccountType.account_type_1, not_(AccountDB.archived))
+    )
+    result = await db.session.execute(stmt)
+    return {(r.company_id, r.currency): r.id for r in result}
+
+
+def _insert_accounts(accounts_dto: list[AccountCreateDTO]):
+    """
+    Accounts insert, the rows violating a unique index (an account number or an
+    account_type_1 of the company in the currency that already exists) are skipped
+    """
+    additional_info = [
+        json.dumps(a.dict(include={"additional_info"})["additional_info"])
+        for a in accounts_dto
+    ]
+    batch = _unnest(
+        "batch",
+        {
+            # enum and jsonb arrays are sent as text[] and cast
+            "type": (String, [a.type.name for a in accounts_dto]),
+            "currency": (String, [a.currency for a in accounts_dto]),
+            "account": (String, [a.account for a in accounts_dto]),
+            "company_id": (
+                AccountDB.company_id.type,
+                [a.company_id for a in accounts_dto],
+            ),
+            "additional_info": (Text, additional_info),
+        },
+    )
+    columns = ["type", "currency", "account", "company_id", "additional_info"]
+    stmt = postgresql.insert(AccountDB).from_select(
+        columns,
+        select(
+            cast(batch.c.type, AccountDB.type.type),
+            batch.c.currency,
+            batch.c.account,
+            batch.c.company_id,
+            cast(batch.c.additional_info, postgresql.JSONB),
         ),
-        None,
     )
+    return stmt.on_conflict_do_nothing().returning(AccountDB.id, AccountDB.account)
 
-    # only one account per company in a given currency
-    if not account:
-        try:
-            model_kwargs = account_dto.dict(exclude={"company_name"})
-
-            if account_dto.company_id is not None:
-                await db.session.merge(
-                    CompanyDB(
-                        id=account_dto.company_id,
-                        name=account_dto.company_name,
-                    )
+
+async def create_accounts_bulk(accounts_dto: list[AccountCreateDTO]) -> list[dict]:
+    """
+    create_account for a batch, with set-based statements in one transaction: company
+    upsert, existing accounts lookup and account insert, whatever the batch size.
+    Per account result (AccountBulkItemResponse): created, existing (only one account
+    per company in a given currency) or conflict (the account number already exists).
+    """
+    results: list[Optional[dict]] = [None] * len(accounts_dto)
+
+    def result(index, status, account_id=None, detail=None):
+        account_id = str(account_id) if account_id else None
+        results[index] = dict(index=index, status=status, id=account_id, detail=detail)
+
+    companies = {
+        a.company_id: a.company_name for a in accounts_dto if a.company_id is not None
+    }
+    # only one account per company in a given currency (account_type_1)
+    rule_keys = [
+        (a.company_id, a.currency) if a.type == AccountType.account_type_1 else None
+        for a in accounts_dto
+    ]
+
+    try:
+        if companies:
+            await db.session.execute(_upsert_companies(companies))
+
+        existing = {}
+        if any(rule_keys):
+            existing = await _existing_accounts_by_company_currency(
+                {k for k in rule_keys if k is not None}
+            )
+
+        to_insert: dict[str, int] = {}  # account number -> index
+        inserted_for_key: dict[tuple, int] = {}  # rule key -> index
+        same_as: dict[int, int] = {}  # index -> index of the account it duplicates
+        for i, (account_dto, key) in enumerate(zip(accounts_dto, rule_keys)):
+            if key in existing:
+                result(i, AccountCreateStatus.existing, existing[key])
+            elif key in inserted_for_key:
+                same_as[i] = inserted_for_key[key]
+            elif account_dto.account in to_insert:
+                result(
+                    i, AccountCreateStatus.conflict, detail="Duplicate account number"
                 )
+            else:
+                to_insert[account_dto.account] = i
+                if key is not None:
+                    inserted_for_key[key] = i
 
-            account = AccountDB(**model_kwargs)
+        created = {}
+        if to_insert:
+            rows = await db.session.execute(
+                _insert_accounts([accounts_dto[i] for i in to_insert.values()])
+            )
+            created = {r.account: r.id for r in rows}
+            # skipped rows: an account of the company in the currency may have been
+            # inserted concurrently since the lookup
+            skipped_keys = {
+                rule_keys[i]
+                for number, i in to_insert.items()
+                if number not in created and rule_keys[i] is not None
+            }
+            if skipped_keys:
+                existing.update(
+                    await _existing_accounts_by_company_currency(skipped_keys)
+                )
+        await db.session.commit()
+    except IntegrityError as error:
+        logger.error(str(error))
+        raise ConflictWhenInsert(
+            f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {error}"  # noqa
+        )
 
-            db.session.add(account)
-            await db.session.commit()
-            await db.session.refresh(account)
-        except IntegrityError as error:
-            logger.error(str(error))
-            raise ConflictWhenInsert(
-                f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {error}"  # noqa
+    for number, i in to_insert.items():
+        if number in created:
+            result(i, AccountCreateStatus.created, created[number])
+        elif rule_keys[i] in existing:
+            result(i, AccountCreateStatus.existing, existing[rule_keys[i]])
+        else:
+            result(
+                i, AccountCreateStatus.conflict, detail="Account number already exists"
             )
-        logger.debug(f"Create new Account: {str(account)}")
+    for i, first in same_as.items():
+        if results[first]["status"] == AccountCreateStatus.created:
+            result(i, AccountCreateStatus.existing, results[first]["id"])
+        else:
+            result(i, AccountCreateStatus.conflict, detail=results[first]["detail"])
+
+    logger.debug(f"Create accounts: {len(created)} of {len(accounts_dto)} created")
+
+    # company names may have been changed by the upsert
+    for company_id in companies:
+        accounts_cache.invalidate_tag(("company", company_id))
 
-    return map_raw_account(account)
+    return results
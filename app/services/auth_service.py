@@ -1,9 +1,218 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional, Union
 from uuid import UUID
 
+import httpx
+import jwt
+
+from app.services.cache import SingleFlight, TTLCache
+from app.settings import app_settings
+
+logger = logging.getLogger("app")
+
+# introspection results by token sha256: auth info, False for an inactive token
+token_cache = TTLCache(
+    "sso_tokens", maxsize=app_settings.SSO_CACHE_SIZE, ttl=app_settings.SSO_CACHE_TTL
+)
+token_flight = SingleFlight("sso_tokens")
+
+
+class InvalidToken(Exception):
+    """Raised when the token is not active (invalid, expired or revoked)."""
+
+
+class JWKSKeys:
+    """
+    SSO signing keys (JWKS) by key id, kept in memory. Refreshed in the background
+    and on an unknown key id (key rotation), at most once per MIN_REFRESH_INTERVAL.
+    """
+
+    MIN_REFRESH_INTERVAL = 10
+
+    def __init__(self, url: str, refresh_interval: float):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self._keys: dict[Optional[str], jwt.PyJWK] = {}
+        self._refreshed = -self.MIN_REFRESH_INTERVAL
+        self._flight = SingleFlight("sso_jwks")
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        response = await PrivateAuthService.client().get(self.url)
+        response.raise_for_status()
+        key_set = jwt.PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in key_set.keys}
+        self._refreshed = time.monotonic()
+
+    async def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """Signing key by id, None if unknown (also if the key set can't be refreshed)"""
+        key = self._keys.get(kid)
+        if key is None and (
+            time.monotonic() - self._refreshed >= self.MIN_REFRESH_INTERVAL
+        ):
+            try:
+                await self._flight.do("refresh", self.refresh)
+            except (httpx.HTTPError, jwt.PyJWTError, ValueError) as error:
+                # keep the previous keys, retried after MIN_REFRESH_INTERVAL
+                logger.warning(f"JWKS refresh error: {str(error)}")
+                self._refreshed = time.monotonic()
+            key = self._keys.get(kid)
+        return key
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._flight.do("refresh", self.refresh)
+            except (httpx.HTTPError, jwt.PyJWTError, ValueError) as error:
+                # keep the previous keys until the next refresh
+                logger.warning(f"JWKS refresh error: {str(error)}")
+            await asyncio.sleep(self.refresh_interval)
+
 
 class PrivateAuthService:
+    _client: Optional[httpx.AsyncClient] = None
+    _jwks: Optional[JWKSKeys] = None
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        # one client per process: pooled (keep-alive) connections to the SSO
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(timeout=app_settings.SSO_INTROSPECT_TIMEOUT)
+        return cls._client
+
+    @classmethod
+    def jwks(cls) -> Optional[JWKSKeys]:
+        """SSO key set, None if the JWT mode is off (SSO_JWKS_URL is not set)"""
+        if cls._jwks is None and app_settings.SSO_JWKS_URL is not None:
+            cls._jwks = JWKSKeys(
+                app_settings.SSO_JWKS_URL, app_settings.SSO_JWKS_REFRESH_INTERVAL
+            )
+        return cls._jwks
+
+    @classmethod
+    def start(cls) -> None:
+        jwks = cls.jwks()
+        if jwks is not None:
+            jwks.start()
+
+    @classmethod
+    async def aclose(cls) -> None:
+        if cls._jwks is not None:
+            await cls._jwks.stop()
+            cls._jwks = None
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    async def authenticate(self, token: str) -> dict:
+        """
+        Auth info of a bearer token. In the JWT mode a JWT is verified locally,
+        without a network call, opaque tokens are introspected.
+        """
+        jwks = self.jwks()
+        if jwks is not None:
+            try:
+                header = jwt.get_unverified_header(token)
+            except jwt.DecodeError:
+                header = None  # opaque token
+            if header is not None:
+                return await self._verify_jwt(jwks, header, token)
+        return await self.introspect(token)
+
+    @staticmethod
+    async def _verify_jwt(jwks: JWKSKeys, header: dict, token: str) -> dict:
+        key = await jwks.get_key(header.get("kid"))
+        if key is None:
+            raise InvalidToken("Unknown token signing key")
+        try:
+            claims = jwt.decode(
+                token,
+                key.key,
+                algorithms=app_settings.SSO_JWT_ALGORITHMS,
+                audience=app_settings.SSO_JWT_AUDIENCE,
+                issuer=app_settings.SSO_JWT_ISSUER,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.InvalidTokenError as error:
+            raise InvalidToken(str(error))
+        return dict(
+            id=claims["sub"],
+            name=claims.get("name"),
+            email=claims.get("email"),
+            company_id=claims.get("company_id"),
+            company_name=claims.get("company_name"),
+        )
+
+    async def introspect(self, token: str) -> dict:
+        """
+        Cached token introspection, concurrent requests with the same token share
+        one upstream call. Raises InvalidToken, httpx.HTTPError if the SSO fails.
+        """
+        if app_settings.SSO_INTROSPECT_URL is None:
+            return self._stub_auth_info()
+
+        key = hashlib.sha256(token.encode()).hexdigest()
+        auth_info = token_cache.get(key)
+        if auth_info is None:
+            auth_info = await token_flight.do(key, self._introspect, key, token)
+        if not auth_info:
+            raise InvalidToken("Token is not active")
+        return auth_info
+
+    async def _introspect(self, key: str, token: str) -> Union[dict, bool]:
+        response = await self.client().post(
+            app_settings.SSO_INTROSPECT_URL, data={"token": token}
+        )
+        response.raise_for_status()
+        try:
+            auth_info = response.json()
+        except ValueError as error:
+            raise httpx.DecodingError(
+                f"Invalid introspection response: {str(error)}",
+                request=response.request,
+            )
+        if not isinstance(auth_info, dict):
+            # not cached: a malformed response is an SSO failure, not a verdict
+            raise httpx.DecodingError(
+                "Invalid introspection response: not an object",
+                request=response.request,
+            )
+
+        if not auth_info.get("active"):
+            token_cache.set(key, False, ttl=app_settings.SSO_NEGATIVE_CACHE_TTL)
+            return False
+
+        ttl = app_settings.SSO_CACHE_TTL
+        exp = auth_info.get("exp")
+        if exp is not None:
+            if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+                raise httpx.DecodingError(
+                    "Invalid introspection response: exp is not a number",
+                    request=response.request,
+                )
+            ttl = min(ttl, exp - time.time())
+        if ttl > 0:
+            token_cache.set(key, auth_info, ttl=ttl)
+        return auth_info
+
     @staticmethod
-    def introspect(token: str) -> dict:
+    def _stub_auth_info() -> dict:
         auth_info = dict(
             id=UUID("523b8267-098d-4b16-b86f-95f923da9ebd"),
             name="Unknown User",
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from prometheus_client import Counter
+
+CACHE_HITS = Counter("cache_hits", "In-process cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses", "In-process cache misses", ["cache"])
+CACHE_EVICTIONS = Counter(
+    "cache_evictions",
+    "In-process cache evictions (size: LRU, ttl: expired, invalidate: data changed)",
+    ["cache", "reason"],
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "single_flight_shared",
+    "Calls served by the result of an identical call already in flight",
+    ["name"],
+)
+
+
+class TTLCache:
+    """
+    Bounded in-process cache: entries expire after `ttl` seconds, the least recently
+    used entry is evicted when `maxsize` is reached.
+    Entries are tagged (e.g. ("company", company_id)) to be invalidated by the data
+    they were built from, without knowing their keys.
+    Not thread-safe: used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (expires, value, tags)
+        self._data: OrderedDict[Hashable, tuple[float, Any, tuple]] = OrderedDict()
+        self._tags: dict[Hashable, set] = {}
+
+        self._hits = CACHE_HITS.labels(name)
+        self._misses = CACHE_MISSES.labels(name)
+        self._evictions = {
+            reason: CACHE_EVICTIONS.labels(name, reason)
+            for reason in ("size", "ttl", "invalidate")
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            self._remove(key, "ttl")
+            entry = None
+        if entry is None:
+            self._misses.inc()
+            return None
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return entry[1]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[Hashable] = (),
+        ttl: Optional[float] = None,
+    ) -> None:
+        """ttl: entry time to live, the cache ttl by default"""
+        if self.maxsize <= 0:
+            return
+        if key in self._data:
+            self._remove(key)
+        tags = tuple(tags)
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self._remove(next(iter(self._data)), "size")
+
+    def invalidate(self, key: Hashable) -> None:
+        if key in self._data:
+            self._remove(key, "invalidate")
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        for key in tuple(self._tags.get(tag, ())):
+            self._remove(key, "invalidate")
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+
+    def _remove(self, key: Hashable, reason: Optional[str] = None) -> None:
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+        if reason:
+            self._evictions[reason].inc()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: callers with the same key await the one
+    call in flight (started by the first caller, in its context) and share its result
+    or exception. Nothing is kept once the call is done.
+    The call is shielded: a cancelled caller does not cancel it for the others. It
+    must not use the resources of its caller (e.g. the request db.session), they are
+    released when the caller is cancelled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self._shared = SINGLE_FLIGHT_SHARED.labels(name)
+
+    async def do(
+        self, key: Hashable, func: Callable[..., Awaitable], *args, **kwargs
+    ) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(partial(self._done, key))
+        else:
+            self._shared.inc()
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # retrieved: no "exception was never retrieved" if every caller was cancelled
+            future.exception()
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+import orjson
+from prometheus_client import Counter, Gauge
+from pydantic.datetime_parse import parse_datetime
+
+from app.database.session import async_engine
+from app.services.accounts import change_watermark, read_account_changes
+from app.settings import app_settings
+
+logger = logging.getLogger("app")
+
+EVENTS_SUBSCRIBERS = Gauge("events_subscribers", "Connected account events streams")
+EVENTS_OVERFLOWS = Counter(
+    "events_overflows",
+    "Account events streams disconnected because the subscriber lagged behind",
+)
+
+
+class Subscription:
+    """Bounded queue of the change batches published to one subscriber"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)  # wakes up a waiting reader
+        except asyncio.QueueFull:
+            pass  # the reader checks `closed` before waiting again
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next change batch, None on timeout. Raises EOFError once closed."""
+        if self.closed:
+            raise EOFError
+        try:
+            change = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if change is None:
+            raise EOFError
+        return change
+
+
+class ChangeBroadcaster:
+    """
+    Fans out the account changes of the ChangeListener (one LISTEN connection per
+    worker) to the subscribers' bounded queues. A subscriber that lags behind
+    (queue full) is disconnected instead of buffering without limit or slowing down
+    the others: it resumes from its last event id with the change feed.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: set[Subscription] = set()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscriptions.add(subscription)
+        EVENTS_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.discard(subscription)
+            EVENTS_SUBSCRIBERS.dec()
+        subscription.close()
+
+    def publish(self, change: dict) -> None:
+        """ChangeListener callback: the batch of a notification is one queue item"""
+        if change["table"] != "accounts":
+            return
+        if change["rows"] is None:
+            # too many changes to list: the subscribers resume from the change feed
+            self.reset()
+            return
+        for subscription in tuple(self._subscriptions):
+            try:
+                subscription.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                EVENTS_OVERFLOWS.inc()
+                self.unsubscribe(subscription)
+
+    def reset(self) -> None:
+        """
+        ChangeListener reset callback (and shutdown): notifications may have been
+        lost while disconnected, the subscribers resume from their last event id
+        """
+        for subscription in tuple(self._subscriptions):
+            self.unsubscribe(subscription)
+
+
+def _sse(event: str, data: dict) -> bytes:
+    """Server-sent event, its id is the change feed watermark of the change"""
+    watermark = change_watermark(data["modified"], data["id"])
+    return (
+        f"event: {event}\nid: {watermark}\ndata: ".encode()
+        + orjson.dumps(data)
+        + b"\n\n"
+    )
+
+
+def _event_name(archived: bool, created: bool, deleted: bool = False) -> str:
+    if deleted:
+        return "deleted"
+    if archived:
+        return "archived"
+    return "created" if created else "updated"
+
+
+def _notification_events(change: dict) -> bytes:
+    created, deleted = change["op"] == "INSERT", change["op"] == "DELETE"
+    events = []
+    for row in change["rows"]:
+        data = {
+            "id": row["id"],
+            "account": row["account"],
+            "company_id": row["company_id"],
+            "archived": row["archived"],
+            # json_build_object timestamps: trailing zeros of the fraction are dropped
+            "modified": parse_datetime(row["modified"]),
+        }
+        events.append(_sse(_event_name(row["archived"], created, deleted), data))
+    return b"".join(events)
+
+
+def _row_event(row) -> bytes:
+    data = {
+        # str: orjson does not serialize the asyncpg UUID subclass
+        "id": str(row.id),
+        "account": row.account,
+        "company_id": str(row.company_id),
+        "archived": row.archived,
+        "modified": row.modified,
+    }
+    return _sse(_event_name(row.archived, row.created == row.modified), data)
+
+
+async def account_events(
+    broadcaster: ChangeBroadcaster,
+    since: Optional[str] = None,
+    keepalive_interval: float = app_settings.ACCOUNTS_EVENTS_KEEPALIVE,
+    replay_batch_size: int = app_settings.ACCOUNTS_CHANGES_MAX_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    SSE stream of the account changes. With a `since` watermark (Last-Event-ID) the
+    changes after it are replayed from the change feed first. The subscription starts
+    before the replay, which reads without lag: nothing is missed in between, a change
+    may be sent twice (at-least-once delivery). Ends when the subscriber is
+    disconnected by the broadcaster.
+    """
+    subscription = broadcaster.subscribe()
+    try:
+        if since is not None:
+            has_more = True
+            while has_more:
+                # own connection: the response outlives the request db.session
+                async with async_engine.connect() as connection:
+                    rows, since, has_more = await read_account_changes(
+                        since=since, limit=replay_batch_size, lag=0, _session=connection
+                    )
+                if rows:
+                    yield b"".join(_row_event(row) for row in rows)
+
+        while True:
+            try:
+                change = await subscription.get(keepalive_interval)
+            except EOFError:
+                return
+            # comment lines keep idle connections open through proxies
+            yield b": keepalive\n\n" if change is None else _notification_events(change)
+    finally:
+        broadcaster.unsubscribe(subscription)
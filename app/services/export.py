@@ -0,0 +1,197 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import TYPE_CHECKING, AsyncIterator
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from app.api.dependencies.sort import AccountsSort
+    from app.api.dependencies import Filters
+
+import orjson
+
+from app.models.accounts import ACCOUNT_COLUMNS
+from app.services.accounts import stream_accounts
+from app.types import ExportFormat
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: poetry install -E arrow
+    pa = pq = None
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+EXPORT_FIELDS = [c.key for c in ACCOUNT_COLUMNS]
+
+COLUMNAR_FORMATS = (ExportFormat.arrow, ExportFormat.parquet)
+
+
+def is_export_format_available(export_format: ExportFormat) -> bool:
+    return export_format not in COLUMNAR_FORMATS or pa is not None
+
+
+def _plain_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_value(value):
+    # orjson encodes enums and datetimes, not asyncpg's UUID subclass
+    return str(value) if isinstance(value, UUID) else value
+
+
+async def _ndjson_chunks(partitions: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    async for partition in partitions:
+        yield b"".join(
+            orjson.dumps(
+                {k: _ndjson_value(v) for k, v in row._mapping.items()},
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+            for row in partition
+        )
+
+
+async def _csv_chunks(partitions: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for partition in partitions:
+        for row in partition:
+            writer.writerow(
+                json.dumps(v, ensure_ascii=False)
+                if isinstance(v, dict)
+                else _plain_value(v)
+                for v in row
+            )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """Write-only file object for pyarrow writers, drained after every record batch"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        ...
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema():
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("type", pa.dictionary(pa.int8(), pa.string())),
+            ("currency", pa.string()),
+            ("account", pa.string()),
+            ("company_id", pa.string()),
+            ("company_name", pa.string()),
+            ("additional_info", pa.string()),
+            ("created", timestamp),
+            ("modified", timestamp),
+        ]
+    )
+
+
+def _record_batch(schema, partition: list):
+    """Columns are filled straight from Core rows, without per-row models"""
+    (
+        ids,
+        types,
+        currencies,
+        accounts,
+        company_ids,
+        company_names,
+        additional_info,
+        created,
+        modified,
+    ) = zip(*partition)
+    return pa.record_batch(
+        [
+            pa.array([str(v) for v in ids], pa.string()),
+            pa.array([v.value for v in types], schema.field("type").type),
+            pa.array(currencies, pa.string()),
+            pa.array(accounts, pa.string()),
+            pa.array([str(v) for v in company_ids], pa.string()),
+            pa.array(company_names, pa.string()),
+            pa.array(
+                [json.dumps(v, ensure_ascii=False) for v in additional_info],
+                pa.string(),
+            ),
+            pa.array(created, schema.field("created").type),
+            pa.array(modified, schema.field("modified").type),
+        ],
+        schema=schema,
+    )
+
+
+async def _columnar_chunks(
+    partitions: AsyncIterator[list], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    if export_format == ExportFormat.parquet:
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+
+    async for partition in partitions:
+        # one record batch (parquet: one row group) per partition
+        writer.write_batch(_record_batch(schema, partition))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_accounts(
+    *,
+    export_format: ExportFormat,
+    filters: "Filters",
+    sort: "AccountsSort",
+) -> AsyncIterator[bytes]:
+    """Accounts encoded partition by partition, memory use does not depend on the result size"""
+    partitions = stream_accounts(filters=filters, sort=sort)
+    if export_format in COLUMNAR_FORMATS:
+        return _columnar_chunks(partitions, export_format)
+    if export_format == ExportFormat.csv:
+        return _csv_chunks(partitions)
+    return _ndjson_chunks(partitions)
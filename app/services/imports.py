@@ -0,0 +1,273 @@
+import codecs
+import csv
+import json
+import logging
+import tempfile
+from typing import IO, AsyncIterator, Optional
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.database.errors import ConflictWhenInsert
+from app.database.session import async_engine
+from app.schemas.create.accounts import AccountCreateDTO
+from app.services.accounts import accounts_cache
+from app.settings import app_settings
+from app.types import ImportFormat
+
+logger = logging.getLogger("app")
+
+IMPORT_MEDIA_TYPES = {
+    ImportFormat.ndjson: "application/x-ndjson",
+    ImportFormat.csv: "text/csv",
+}
+
+STAGING_COLUMNS = (
+    "line",
+    "type",
+    "currency",
+    "account",
+    "company_id",
+    "company_name",
+    "additional_info",
+)
+
+# the report is kept in memory up to this size, then spooled to disk
+REPORT_MAX_MEMORY = 1024 * 1024
+
+# a unique staging table name per import: the statements using it are new to the
+# prepared statement caches, no cached plan refers to a dropped temp table
+STAGING_TABLE_SQL = """
+create temp table {table} (
+    line integer not null,
+    type text not null,
+    currency text not null,
+    account text not null,
+    company_id uuid not null,
+    company_name text not null,
+    additional_info jsonb not null
+) on commit drop
+"""
+
+MERGE_COMPANIES_SQL = """
+insert into companies (id, name)
+select distinct on (company_id) company_id, company_name
+from {table}
+order by company_id, line desc
+on conflict (id) do update set name = excluded.name
+    where companies.name is distinct from excluded.name
+"""
+
+# accounts that are not inserted: the account number exists (in the database or on
+# a previous line) or the company already has an account_type_1 in this currency
+MERGE_ACCOUNTS_SQL = """
+with inserted as (
+    insert into accounts (type, currency, account, company_id, additional_info)
+    select type::account_type, currency, account, company_id, additional_info
+    from (
+        select distinct on (account) *
+        from {table}
+        order by account, line
+    ) first_lines
+    order by line
+    on conflict do nothing
+    returning account
+)
+select line, account
+from (
+    select line, account, line <> min(line) over (partition by account) as duplicate
+    from {table}
+) i
+where duplicate or not exists (select from inserted where inserted.account = i.account)
+order by line
+"""
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Numbered lines of an UTF-8 byte stream"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    number = 0
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            number += 1
+            yield number, line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield number + 1, buffer
+
+
+async def _ndjson_records(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    async for number, line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "A JSON object is expected"
+            continue
+        yield number, record, None
+
+
+async def _csv_records(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """CSV with a header, the column layout of the CSV export (`additional_info` as JSON)"""
+    header = None
+    pending, pending_number = None, 0
+    async for number, line in _lines(chunks):
+        # a quoted value may contain line breaks: a record ends on an even number of quotes
+        if pending is None:
+            pending, pending_number = line, number
+        else:
+            pending = f"{pending}\n{line}"
+        if pending.count('"') % 2:
+            continue
+        record_line, pending = pending, None
+        if not record_line.strip():
+            continue
+
+        values = next(csv.reader([record_line]))
+        if header is None:
+            header = values
+            continue
+        record = {k: v for k, v in zip(header, values) if v != ""}
+        if "additional_info" in record:
+            try:
+                record["additional_info"] = json.loads(record["additional_info"])
+            except ValueError as error:
+                yield pending_number, None, f"Invalid additional_info JSON: {error}"
+                continue
+        yield pending_number, record, None
+    if pending is not None:
+        yield pending_number, None, "Unterminated quoted value"
+
+
+def _write_report_line(report: IO[bytes], data: dict) -> None:
+    line = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+    report.write(line.encode() + b"\n")
+
+
+async def import_accounts(
+    chunks: AsyncIterator[bytes],
+    import_format: ImportFormat,
+    batch_size: int = app_settings.ACCOUNTS_IMPORT_BATCH_SIZE,
+) -> IO[bytes]:
+    """
+    Streams the uploaded rows into a staging table (COPY, batch by batch, memory use does
+    not depend on the file size), then merges companies and accounts in one transaction
+    with the rules of create_account.
+    Returns the NDJSON report (rewound): invalid and not created lines, then a summary.
+    """
+    records = (
+        _csv_records(chunks)
+        if import_format == ImportFormat.csv
+        else _ndjson_records(chunks)
+    )
+    table = f"accounts_import_{uuid4().hex}"
+    report = tempfile.SpooledTemporaryFile(max_size=REPORT_MAX_MEMORY)
+    rows = invalid = skipped = 0
+
+    try:
+        async with async_engine.begin() as connection:
+            await connection.execute(text(STAGING_TABLE_SQL.format(table=table)))
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+
+            async def copy(batch):
+                await driver_connection.copy_records_to_table(
+                    table, records=batch, columns=STAGING_COLUMNS
+                )
+
+            batch = []
+            async for number, record, error in records:
+                rows += 1
+                if error is None:
+                    try:
+                        account = AccountCreateDTO(**record)
+                    except ValidationError as validation_error:
+                        error = validation_error.errors()
+                if error is not None:
+                    invalid += 1
+                    _write_report_line(report, {"line": number, "error": error})
+                    continue
+
+                batch.append(
+                    (
+                        number,
+                        account.type.name,
+                        account.currency,
+                        account.account,
+                        account.company_id,
+                        account.company_name,
+                        json.dumps(
+                            account.dict(include={"additional_info"})["additional_info"]
+                        ),
+                    )
+                )
+                if len(batch) >= batch_size:
+                    await copy(batch)
+                    batch = []
+            if batch:
+                await copy(batch)
+
+            await connection.execute(text(MERGE_COMPANIES_SQL.format(table=table)))
+            result = await connection.stream(
+                text(MERGE_ACCOUNTS_SQL.format(table=table))
+            )
+            created = rows - invalid
+            async for row in result:
+                skipped += 1
+                _write_report_line(
+                    report,
+                    {
+                        "line": row.line,
+                        "account": row.account,
+                        "error": "Account already exists (account number or an account"
+                        " of the company in this currency)",
+                    },
+                )
+            created -= skipped
+    except IntegrityError as error:
+        report.close()
+        logger.error(str(error))
+        raise ConflictWhenInsert(
+            f"Insert new entity in database raising a unique violation or exclusion constraint violation error: {error}"  # noqa
+        )
+
+    logger.debug(f"Import accounts: {created} of {rows} created")
+    # company names may have been changed
+    accounts_cache.clear()
+
+    _write_report_line(
+        report,
+        {
+            "summary": {
+                "rows": rows,
+                "created": created,
+                "invalid": invalid,
+                "skipped": skipped,
+            }
+        },
+    )
+    report.seek(0)
+    return report
+
+
+async def read_report(
+    report: IO[bytes], chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    try:
+        while chunk := report.read(chunk_size):
+            yield chunk
+    finally:
+        report.close()
@@ -24,6 +24,54 @@ class Settings(BaseSettings):
     DB_DSN: Optional[PostgresDsnV2] = None
     DB_TEST_DSN: Optional[PostgresDsnV2] = None
 
+    # total_mode=estimate: planner estimates below this value are replaced by an exact count
+    PAGINATION_ESTIMATE_THRESHOLD: int = 10000
+
+    # LRU cache size of parsed filter/sort query strings
+    FILTERS_CACHE_SIZE: int = 1024
+
+    # in-process cache of serialized account lookups (by id / number), TTL in seconds
+    ACCOUNTS_CACHE_SIZE: int = 10000
+    ACCOUNTS_CACHE_TTL: float = 60
+    # Cache-Control of account reads (with an ETag): clients revalidate every time
+    ACCOUNTS_CACHE_CONTROL: str = "private, no-cache"
+
+    # max number of accounts in a POST /accounts/bulk request
+    ACCOUNTS_BULK_MAX_SIZE: int = 10000
+    # max number of account IDs (and of numbers) in a POST /accounts/lookup request
+    ACCOUNTS_LOOKUP_MAX_SIZE: int = 1000
+    # max number of company IDs in a POST /accounts/company-ids request
+    ACCOUNTS_COMPANIES_MAX_SIZE: int = 10000
+    # rows validated and copied to the staging table at once by POST /accounts/import
+    ACCOUNTS_IMPORT_BATCH_SIZE: int = 5000
+    # GET /accounts/changes: max batch size, and the age (seconds) a change must
+    # reach to be returned, longer than the longest write transaction
+    ACCOUNTS_CHANGES_MAX_SIZE: int = 1000
+    ACCOUNTS_CHANGES_LAG: float = 5
+    # GET /accounts/events: changes buffered per subscriber (a subscriber lagging
+    # behind is disconnected), seconds between keepalive comments
+    ACCOUNTS_EVENTS_QUEUE_SIZE: int = 1000
+    ACCOUNTS_EVENTS_KEEPALIVE: float = 15
+
+    # LISTEN to row changes (notify triggers) to evict cached lookups in every worker
+    DB_LISTEN_CHANGES: bool = True
+
+    # SSO token introspection (RFC 7662) endpoint, a stub user is used if not set
+    SSO_INTROSPECT_URL: Optional[AnyHttpUrl] = None
+    SSO_INTROSPECT_TIMEOUT: float = 5
+    # introspection results are cached (by token hash) until the token expiry, at most SSO_CACHE_TTL
+    # seconds; inactive tokens for SSO_NEGATIVE_CACHE_TTL seconds
+    SSO_CACHE_SIZE: int = 10000
+    SSO_CACHE_TTL: float = 300
+    SSO_NEGATIVE_CACHE_TTL: float = 30
+    # JWT mode: signed JWTs are verified locally against the SSO key set (JWKS), refreshed every
+    # SSO_JWKS_REFRESH_INTERVAL seconds; opaque tokens are still introspected
+    SSO_JWKS_URL: Optional[AnyHttpUrl] = None
+    SSO_JWKS_REFRESH_INTERVAL: float = 300
+    SSO_JWT_ALGORITHMS: List[str] = ["RS256"]
+    SSO_JWT_ISSUER: Optional[str] = None
+    SSO_JWT_AUDIENCE: Optional[str] = None
+
     # backend_cors_origins is a JSON-formatted list of origins
     # e.g: '["http://localhost", "http://localhost:4200", "http://localhost:3000"]'
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -31,3 +31,26 @@ class AccountType(str, Enum):
     account_type_2 = "account-type-2"
     account_type_3 = "account-type-3"
     account_type_4 = "account-type-4"
+
+
+class AccountCreateStatus(str, Enum):
+    created = "created"
+    existing = "existing"
+    conflict = "conflict"
+
+
+class TotalMode(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    arrow = "arrow"
+    parquet = "parquet"
+
+
+class ImportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
@@ -0,0 +1,101 @@
+"""
+Per-request auth overhead: remote token introspection vs local JWT verification.
+
+Starts a local SSO stub (introspection and JWKS endpoints, on localhost, so the
+introspection round trip is a best case), then authenticates bearer tokens:
+
+- introspection, a new token per request (cache misses)
+- introspection, the same token (cache hits)
+- JWT mode, a new JWT per request (signature verified against the cached JWKS)
+
+    python -m benchmarks.bench_auth --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.services.auth_service import PrivateAuthService, token_cache
+from app.settings import app_settings
+
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+JWK = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(PRIVATE_KEY.public_key()))
+CLAIMS = {
+    "sub": "523b8267-098d-4b16-b86f-95f923da9ebd",
+    "name": "User",
+    "email": "user@company.com",
+    "company_id": "0fadca55-5645-49a4-9782-44b849930bb7",
+    "company_name": "Company",
+}
+
+
+class SSOStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as a real SSO behind a pooled client
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._send_json({"keys": [{**JWK, "kid": "key-1"}]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        claims = {**CLAIMS, "id": CLAIMS["sub"]}
+        self._send_json({"active": True, "exp": int(time.time()) + 600, **claims})
+
+    def _send_json(self, data):
+        content = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def _jwt(i: int) -> str:
+    claims = {**CLAIMS, "exp": int(time.time()) + 600, "jti": str(i)}
+    return jwt.encode(claims, PRIVATE_KEY, algorithm="RS256", headers={"kid": "key-1"})
+
+
+async def _measure(name: str, tokens: list) -> None:
+    service = PrivateAuthService()
+    await service.authenticate(tokens[0])  # warm up: connection, JWKS
+    start = time.perf_counter()
+    for token in tokens:
+        await service.authenticate(token)
+    elapsed = (time.perf_counter() - start) / len(tokens)
+    print(f"  {name:<40} {elapsed * 1e6:10.1f} us/request")
+
+
+async def main(requests: int) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SSOStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    app_settings.SSO_INTROSPECT_URL = f"{url}/introspect"
+    try:
+        print(f"{requests} requests:")
+        app_settings.SSO_JWKS_URL = None
+        await _measure("introspection, cache miss", [f"t{i}" for i in range(requests)])
+        token_cache.clear()
+        await _measure("introspection, cache hit", ["token"] * requests)
+
+        app_settings.SSO_JWKS_URL = f"{url}/jwks"
+        await _measure(
+            "JWT mode, local verification", [_jwt(i) for i in range(requests)]
+        )
+    finally:
+        await PrivateAuthService.aclose()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,62 @@
+"""
+`in` filters: expanding IN (...) parameters vs a single `= ANY(:array)` parameter.
+
+Every distinct list length of an expanding IN renders a different SQL text, that is
+a new asyncpg prepared statement (a PREPARE round trip) and a new entry of its
+statement cache. `= ANY(:array)` renders one SQL text for all list lengths.
+The benchmark renders the final SQL of the accounts list query for lists of
+1..5000 values, as it is sent to the driver, and counts distinct statements.
+
+    python -m benchmarks.bench_in_filters
+"""
+import argparse
+import time
+from uuid import uuid4
+
+from sqlalchemy import not_
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.api.dependencies.filters import in_patch
+from app.models.accounts import AccountDB
+from app.services.accounts import select_account_rows
+
+SIZES = (1, 2, 5, 10, 50, 100, 500, 1000, 2500, 5000)
+
+
+def _expanding_in(column, values):
+    return column.in_(values)
+
+
+def _render(stmt, dialect) -> str:
+    # render_postcompile: expanding parameters are rendered as at execution time
+    return stmt.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    ).string
+
+
+def _run(name: str, build_filter, repeat: int) -> None:
+    dialect = asyncpg_dialect()
+    statements = set()
+    print(f"{name}:")
+    for size in SIZES:
+        values = [uuid4() for _ in range(size)]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            stmt = select_account_rows().filter(
+                not_(AccountDB.archived), build_filter(AccountDB.company_id, values)
+            )
+            sql = _render(stmt, dialect)
+        elapsed = (time.perf_counter() - start) / repeat
+        statements.add(sql)
+        print(
+            f"  {size:>5} values: {elapsed * 1e3:8.3f} ms/statement, {len(sql):>7} chars"
+        )
+    print(f"  distinct statements to prepare: {len(statements)} of {len(SIZES)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    _run("expanding IN", _expanding_in, args.repeat)
+    _run("= ANY(array)", in_patch, args.repeat)
@@ -0,0 +1,100 @@
+"""
+Accounts read path: ORM entities vs Core rows.
+
+Seeds the test database (DB_TEST_DSN, inside a transaction that is rolled back),
+then loads and serializes the same accounts with select(AccountDB) and with
+select_account_rows(). Reports wall/CPU time and allocated memory per row.
+
+    TESTING=1 python -m benchmarks.bench_read_path --rows 20000
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.accounts import AccountDB
+from app.schemas.response.accounts import serialize_account
+from app.services.accounts import select_account_rows
+from app.settings import app_settings
+
+SEED_SQL = (
+    """
+    insert into companies (id, name)
+    select uuid_generate_v4(), 'Bench company ' || g from generate_series(0, 99) g
+    """,
+    """
+    -- one account_type_1 per company and currency (ux_accounts_company_currency)
+    insert into accounts (type, currency, account, company_id, additional_info)
+    select 'account_type_1', lpad((g / 100 % 1000)::text, 3, '0'),
+           'BENCH' || lpad(g::text, 12, '0'), c.id,
+           jsonb_build_object('bank_name', 'Bench bank', 'beneficiary_name', 'Bench ' || g)
+    from generate_series(1, :rows) g
+    join companies c on c.name = 'Bench company ' || (g % 100)
+    """,
+)
+
+
+async def _orm_read(session: AsyncSession) -> list:
+    stmt = select(AccountDB).filter(AccountDB.account.like("BENCH%"))
+    result = await session.execute(stmt)
+    return [serialize_account(a) for a in result.scalars().all()]
+
+
+async def _core_read(session: AsyncSession) -> list:
+    stmt = select_account_rows().filter(AccountDB.account.like("BENCH%"))
+    result = await session.execute(stmt)
+    return [serialize_account(a) for a in result.all()]
+
+
+async def _measure(name: str, read, session: AsyncSession, repeat: int) -> None:
+    await read(session)  # warm up statement caches
+    session.expunge_all()
+
+    wall, cpu, peak, rows = [], [], [], 0
+    for _ in range(repeat):
+        gc.collect()
+        tracemalloc.start()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        items = await read(session)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+        peak.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        rows = len(items)
+        del items
+        session.expunge_all()
+
+    print(
+        f"{name:>5}: {rows} rows,"
+        f" wall {min(wall) / rows * 1e6:8.2f} us/row,"
+        f" cpu {min(cpu) / rows * 1e6:8.2f} us/row,"
+        f" peak memory {min(peak) / rows:8.0f} B/row"
+    )
+
+
+async def main(rows: int, repeat: int) -> None:
+    engine = create_async_engine(app_settings.DB_TEST_DSN)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        for sql in SEED_SQL:
+            await connection.execute(text(sql), {"rows": rows})
+
+        session = AsyncSession(bind=connection)
+        await _measure("orm", _orm_read, session, repeat)
+        await _measure("core", _core_read, session, repeat)
+        await session.close()
+
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,31 @@
+"""Accounts changes index
+
+Revision ID: 3c6f0d2b9a41
+Revises: 7e467a5e189c
+Create Date: 2026-10-17 21:05:12.418390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3c6f0d2b9a41'
+down_revision = '7e467a5e189c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the list sort index covers archived accounts too: also the change feed keyset
+    # (tombstones included). Built before the partial index is dropped, then renamed.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_accounts_modified_id_all', 'accounts', ['modified', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_accounts_modified_id', table_name='accounts', postgresql_concurrently=True)
+    op.execute('alter index ix_accounts_modified_id_all rename to ix_accounts_modified_id')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_accounts_modified_id_active', 'accounts', ['modified', 'id'], unique=False, postgresql_where=sa.text('not archived'), postgresql_concurrently=True)
+        op.drop_index('ix_accounts_modified_id', table_name='accounts', postgresql_concurrently=True)
+    op.execute('alter index ix_accounts_modified_id_active rename to ix_accounts_modified_id')
@@ -0,0 +1,26 @@
+"""Accounts company currency unique
+
+Revision ID: 7e467a5e189c
+Revises: a99f472d28af
+Create Date: 2026-10-17 19:21:44.806513
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7e467a5e189c'
+down_revision = 'a99f472d28af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # only one account (account_type_1) per company in a given currency,
+    # fails if existing accounts violate the rule: archive the duplicates first
+    with op.get_context().autocommit_block():
+        op.create_index('ux_accounts_company_currency', 'accounts', ['company_id', 'currency'], unique=True, postgresql_where=sa.text("type = 'account_type_1' and not archived"), postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ux_accounts_company_currency', table_name='accounts')
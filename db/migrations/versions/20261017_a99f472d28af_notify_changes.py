@@ -0,0 +1,193 @@
+"""Notify changes
+
+Revision ID: a99f472d28af
+Revises: e48eb88444f1
+Create Date: 2026-10-17 16:40:07.530921
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a99f472d28af'
+down_revision = 'e48eb88444f1'
+branch_labels = None
+depends_on = None
+
+
+# Payloads are sent on commit, to all sessions listening on the `changes` channel.
+# Statement level triggers: the changed rows of a statement (transition tables) are
+# sent in batches of 20, a NOTIFY payload is limited to 8000 bytes. A statement that
+# changes more than 1000 rows sends a single notification with "rows": null, the
+# listeners drop what they derived from the table instead of reading a flood.
+notify_accounts_changes_sql = """
+create or replace function notify_accounts_changes() returns trigger
+    language plpgsql
+as
+$$
+declare
+    rows_count bigint;
+    changes json;
+    batch json;
+begin
+    if tg_op = 'DELETE' then
+        select count(*) into rows_count from old_rows;
+    else
+        select count(*) into rows_count from new_rows;
+    end if;
+    if rows_count = 0 then
+        return null;
+    end if;
+    if rows_count > 1000 then
+        perform pg_notify('changes', json_build_object(
+            'table', tg_table_name, 'op', tg_op, 'rows', null
+        )::text);
+        return null;
+    end if;
+
+    -- a transition table is only visible to the triggers that declare it
+    if tg_op = 'UPDATE' then
+        select json_agg(json_build_object(
+            'id', n.id,
+            'account', n.account,
+            'old_account', o.account,
+            'company_id', n.company_id,
+            'archived', n.archived,
+            'modified', n.modified
+        )) into changes
+        from new_rows n join old_rows o on o.id = n.id;
+    elsif tg_op = 'INSERT' then
+        select json_agg(json_build_object(
+            'id', n.id,
+            'account', n.account,
+            'old_account', null,
+            'company_id', n.company_id,
+            'archived', n.archived,
+            'modified', n.modified
+        )) into changes
+        from new_rows n;
+    else
+        select json_agg(json_build_object(
+            'id', o.id,
+            'account', o.account,
+            'old_account', null,
+            'company_id', o.company_id,
+            'archived', o.archived,
+            'modified', o.modified
+        )) into changes
+        from old_rows o;
+    end if;
+
+    for batch in
+        select json_agg(e.value)
+        from json_array_elements(changes) with ordinality e
+        group by (e.ordinality - 1) / 20
+    loop
+        perform pg_notify('changes', json_build_object(
+            'table', tg_table_name, 'op', tg_op, 'rows', batch
+        )::text);
+    end loop;
+    return null;
+end;
+$$;
+"""
+
+notify_companies_changes_sql = """
+create or replace function notify_companies_changes() returns trigger
+    language plpgsql
+as
+$$
+declare
+    rows_count bigint;
+    changes json;
+    batch json;
+begin
+    if tg_op = 'DELETE' then
+        select count(*) into rows_count from old_rows;
+    else
+        select count(*) into rows_count from new_rows;
+    end if;
+    if rows_count = 0 then
+        return null;
+    end if;
+    if rows_count > 1000 then
+        perform pg_notify('changes', json_build_object(
+            'table', tg_table_name, 'op', tg_op, 'rows', null
+        )::text);
+        return null;
+    end if;
+
+    if tg_op = 'DELETE' then
+        select json_agg(json_build_object('id', o.id, 'modified', o.modified))
+        into changes from old_rows o;
+    else
+        select json_agg(json_build_object('id', n.id, 'modified', n.modified))
+        into changes from new_rows n;
+    end if;
+
+    for batch in
+        select json_agg(e.value)
+        from json_array_elements(changes) with ordinality e
+        group by (e.ordinality - 1) / 20
+    loop
+        perform pg_notify('changes', json_build_object(
+            'table', tg_table_name, 'op', tg_op, 'rows', batch
+        )::text);
+    end loop;
+    return null;
+end;
+$$;
+"""
+
+# a trigger with transition tables has a single event
+statement_triggers_sql = (
+    """
+create trigger accounts_notify_insert_tgr
+ after insert on accounts
+  referencing new table as new_rows
+   for each statement execute procedure notify_accounts_changes();
+""",
+    """
+create trigger accounts_notify_update_tgr
+ after update on accounts
+  referencing old table as old_rows new table as new_rows
+   for each statement execute procedure notify_accounts_changes();
+""",
+    """
+create trigger accounts_notify_delete_tgr
+ after delete on accounts
+  referencing old table as old_rows
+   for each statement execute procedure notify_accounts_changes();
+""",
+    """
+create trigger companies_notify_update_tgr
+ after update on companies
+  referencing old table as old_rows new table as new_rows
+   for each statement execute procedure notify_companies_changes();
+""",
+    """
+create trigger companies_notify_delete_tgr
+ after delete on companies
+  referencing old table as old_rows
+   for each statement execute procedure notify_companies_changes();
+""",
+)
+
+
+def upgrade():
+    op.execute(notify_accounts_changes_sql)
+    op.execute(notify_companies_changes_sql)
+    for trigger_sql in statement_triggers_sql:
+        op.execute(trigger_sql)
+
+
+def downgrade():
+    for trigger, table in (
+        ('companies_notify_delete_tgr', 'companies'),
+        ('companies_notify_update_tgr', 'companies'),
+        ('accounts_notify_delete_tgr', 'accounts'),
+        ('accounts_notify_update_tgr', 'accounts'),
+        ('accounts_notify_insert_tgr', 'accounts'),
+    ):
+        op.execute(f"drop trigger if exists {trigger} on {table};")
+    op.execute("drop function if exists notify_companies_changes();")
+    op.execute("drop function if exists notify_accounts_changes();")
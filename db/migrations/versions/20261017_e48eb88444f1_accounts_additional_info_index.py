@@ -0,0 +1,24 @@
+"""Accounts additional_info index
+
+Revision ID: e48eb88444f1
+Revises: ec25a4a314c2
+Create Date: 2026-10-17 14:03:52.118240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e48eb88444f1'
+down_revision = 'ec25a4a314c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_accounts_additional_info', 'accounts', ['additional_info'], unique=False, postgresql_using='gin', postgresql_ops={'additional_info': 'jsonb_path_ops'}, postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ix_accounts_additional_info', table_name='accounts')
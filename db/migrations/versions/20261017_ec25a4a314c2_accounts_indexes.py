@@ -0,0 +1,36 @@
+"""Accounts indexes
+
+Revision ID: ec25a4a314c2
+Revises: b8984957477d
+Create Date: 2026-10-17 10:12:31.402715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'ec25a4a314c2'
+down_revision = 'b8984957477d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm is not a trusted extension in PostgreSQL 12, see db/create-db.sh
+    op.execute("create extension if not exists pg_trgm;")
+
+    # built concurrently: accounts may already be large, writes must not be blocked
+    with op.get_context().autocommit_block():
+        op.create_index('ix_accounts_modified_id', 'accounts', ['modified', 'id'], unique=False, postgresql_where=sa.text('not archived'), postgresql_concurrently=True)
+        op.create_index('ix_accounts_created_id', 'accounts', ['created', 'id'], unique=False, postgresql_where=sa.text('not archived'), postgresql_concurrently=True)
+        op.create_index('ix_accounts_company_id', 'accounts', ['company_id'], unique=False, postgresql_where=sa.text('not archived'), postgresql_concurrently=True)
+        op.create_index('ix_accounts_account_trgm', 'accounts', ['account'], unique=False, postgresql_using='gin', postgresql_ops={'account': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_companies_name_trgm', 'companies', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ix_companies_name_trgm', table_name='companies')
+    op.drop_index('ix_accounts_account_trgm', table_name='accounts')
+    op.drop_index('ix_accounts_company_id', table_name='accounts')
+    op.drop_index('ix_accounts_created_id', table_name='accounts')
+    op.drop_index('ix_accounts_modified_id', table_name='accounts')
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+from sqlalchemy import String, literal, select
+from sqlalchemy.dialects import postgresql
+
+from app.api.dependencies.filters import Filters, in_patch, not_in_patch, parse_filters
+from app.models.accounts import AccountDB
+from app.types import AccountType
+
+FILTER = (
+    '[{"property": "type", "operator": "=", "value": "account-type-1"},'
+    '{"property": "modified", "operator": ">=", "value": "2022-08-01"}]'
+)
+
+
+def test_filters_values_cast_once():
+    filters = Filters(filters=FILTER)
+
+    assert [c.value for c in filters.criteria] == [
+        AccountType.account_type_1,
+        datetime(2022, 8, 1),
+    ]
+
+
+def test_filters_parsed_once():
+    first = Filters(filters=FILTER)
+    hits = parse_filters.cache_info().hits
+    second = Filters(filters=FILTER)
+
+    assert parse_filters.cache_info().hits == hits + 1
+    assert second.sqlalchemy_filters is first.sqlalchemy_filters
+
+
+def test_filters_additional_info_containment():
+    filters = Filters(
+        filters='{"property": "additional_info.bank_name", "operator": "in",'
+        ' "value": ["Bank A", "Bank B"]}'
+    )
+    (sqlalchemy_filter,) = filters.sqlalchemy_filters
+    compiled = sqlalchemy_filter.compile()
+
+    assert str(compiled).count("accounts.additional_info @>") == 2
+    assert list(compiled.params.values()) == [
+        {"bank_name": "Bank A"},
+        {"bank_name": "Bank B"},
+    ]
+
+
+def test_filters_additional_info_operator_not_supported():
+    with pytest.raises(RequestValidationError):
+        Filters(
+            filters='{"property": "additional_info.bank_name", "operator": "like",'
+            ' "value": "Bank%"}'
+        )
+
+
+@pytest.mark.parametrize("values", [[], ["840"], ["840", "978", "643"]])
+def test_filters_in_single_array_parameter(values):
+    # the same SQL text whatever the number of values
+    for patch, sql in (
+        (in_patch, "accounts.currency = ANY (%(param_1)s::VARCHAR(3)[])"),
+        (not_in_patch, "accounts.currency != ALL (%(param_1)s::VARCHAR(3)[])"),
+    ):
+        compiled = patch(AccountDB.currency, values).compile(
+            dialect=postgresql.dialect()
+        )
+        assert str(compiled) == sql
+        assert compiled.params == {"param_1": values}
+
+
+@pytest.mark.asyncio
+async def test_filters_in_empty_list(db_engine):
+    # as IN () / NOT IN (): nothing is in an empty list
+    value = literal("840", String(3))
+    stmt = select(
+        in_patch(value, []),
+        not_in_patch(value, []),
+        in_patch(value, ["840", "978"]),
+        not_in_patch(value, ["840", "978"]),
+    )
+    async with db_engine.connect() as connection:
+        result = await connection.execute(stmt)
+    assert tuple(result.one()) == (False, True, True, False)
@@ -0,0 +1,85 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from app.services import accounts as accounts_service
+
+pytestmark = pytest.mark.asyncio
+
+
+def _account(account_type, currency, number, company_id):
+    return {
+        "type": account_type,
+        "currency": currency,
+        "account": number,
+        "company_id": str(company_id),
+        "company_name": "Bulk company",
+        "additional_info": {"bank_name": "Bank"},
+    }
+
+
+async def test_create_accounts_bulk(client: AsyncClient, company_factory):
+    company_id = await company_factory()
+    prefix = uuid4().hex[:8].upper()
+    accounts = [
+        _account("account-type-1", "840", f"{prefix}0001", company_id),
+        # one account_type_1 account per company in a given currency
+        _account("account-type-1", "840", f"{prefix}0002", company_id),
+        _account("account-type-3", "840", f"{prefix}0003", company_id),
+        _account("account-type-3", "978", f"{prefix}0003", company_id),
+    ]
+    response = await client.post("/v1/accounts/bulk", json=accounts)
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()
+    assert [r["status"] for r in results] == [
+        "created",
+        "existing",
+        "created",
+        "conflict",
+    ]
+    assert results[1]["id"] == results[0]["id"]
+
+    response = await client.post("/v1/accounts/bulk", json=accounts[:3])
+    assert [r["status"] for r in response.json()] == [
+        "existing",
+        "existing",
+        "conflict",
+    ]
+
+
+async def test_create_accounts_bulk_concurrent_insert(
+    client: AsyncClient, company_factory, monkeypatch
+):
+    company_id = await company_factory()
+    prefix = uuid4().hex[:8].upper()
+    response = await client.post(
+        "/v1/accounts/bulk",
+        json=[_account("account-type-1", "840", f"{prefix}0001", company_id)],
+    )
+    account_id = response.json()[0]["id"]
+
+    # the account inserted concurrently, after the lookup of the existing ones
+    lookup = accounts_service._existing_accounts_by_company_currency
+    calls = []
+
+    async def racing_lookup(keys):
+        calls.append(keys)
+        return {} if len(calls) == 1 else await lookup(keys)
+
+    monkeypatch.setattr(
+        accounts_service, "_existing_accounts_by_company_currency", racing_lookup
+    )
+    response = await client.post(
+        "/v1/accounts/bulk",
+        json=[
+            _account("account-type-1", "840", f"{prefix}0002", company_id),
+            _account("account-type-3", "840", f"{prefix}0003", company_id),
+        ],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()
+    assert [r["status"] for r in results] == ["existing", "created"]
+    assert results[0]["id"] == account_id
+    assert len(calls) == 2
@@ -0,0 +1,126 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette import status
+
+from app.database.listener import ChangeListener
+from app.services.accounts import accounts_cache, evict_changed_accounts
+from app.services.cache import CACHE_HITS
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def company_account(client: AsyncClient, company_factory):
+    """An account of a new company: (account id, company id, account number)"""
+    company_id = await company_factory()
+    number = uuid4().hex[:16].upper()
+    accounts_cache.clear()
+    try:
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": "840",
+                "account": number,
+                "company_id": str(company_id),
+                "company_name": "Cache company",
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        yield response.json()["id"], company_id, number
+    finally:
+        accounts_cache.clear()
+
+
+@pytest.fixture
+async def listener(db_engine):
+    listener = ChangeListener(db_engine.url)
+    listener.add_callback(evict_changed_accounts)
+    listener.start()
+    await asyncio.wait_for(listener.connected.wait(), 5)
+    yield listener
+    await listener.stop()
+
+
+async def _wait_for(client: AsyncClient, url: str, key: str, value) -> dict:
+    """The account once the notification evicted the stale entry"""
+    for _ in range(50):
+        account = (await client.get(url)).json()
+        if account[key] == value:
+            return account
+        await asyncio.sleep(0.1)
+    raise AssertionError(f"{url} {key} is still {account[key]}")
+
+
+async def _update(db_engine, sql: str, **params) -> None:
+    # committed outside of the application: only a notification evicts the cache
+    async with db_engine.begin() as connection:
+        await connection.execute(text(sql), params)
+
+
+async def test_cached_account_read(client, db_engine, company_account):
+    account_id, _, number = company_account
+    hits = CACHE_HITS.labels("accounts")
+
+    for url in (f"/v1/accounts/{account_id}", f"/v1/accounts/account-number/{number}"):
+        first = await client.get(url)
+        hits_before = hits._value.get()
+        second = await client.get(url)
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert hits._value.get() == hits_before + 1
+
+    # without a notification the cached response is served
+    await _update(
+        db_engine, "update accounts set currency = '978' where id = :id", id=account_id
+    )
+    response = await client.get(f"/v1/accounts/{account_id}")
+    assert response.json()["currency"] == "840"
+
+
+async def test_cache_evicted_by_notification(
+    client, db_engine, company_account, listener
+):
+    account_id, company_id, number = company_account
+    url = f"/v1/accounts/{account_id}"
+    number_url = f"/v1/accounts/account-number/{number}"
+    await client.get(url)
+    await client.get(number_url)
+
+    await _update(
+        db_engine, "update accounts set currency = '978' where id = :id", id=account_id
+    )
+    await _wait_for(client, url, "currency", "978")
+    await _wait_for(client, number_url, "currency", "978")
+
+    # a company rename evicts the accounts of the company
+    await _update(
+        db_engine,
+        "update companies set name = 'Cache company 2' where id = :id",
+        id=company_id,
+    )
+    await _wait_for(client, url, "company_name", "Cache company 2")
+
+
+async def test_cache_evicted_by_create(client, company_account):
+    account_id, company_id, _ = company_account
+    url = f"/v1/accounts/{account_id}"
+    assert (await client.get(url)).json()["company_name"] == "Cache company"
+
+    # a create renames the company (upsert): evicted by the request itself
+    response = await client.post(
+        "/v1/accounts",
+        json={
+            "type": "account-type-3",
+            "currency": "978",
+            "account": uuid4().hex[:16].upper(),
+            "company_id": str(company_id),
+            "company_name": "Renamed cache company",
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert (await client.get(url)).json()["company_name"] == "Renamed cache company"
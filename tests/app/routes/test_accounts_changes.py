@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette import status
+
+from app.settings import app_settings
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _poll(client: AsyncClient, since: str) -> tuple[list, str]:
+    items = []
+    while True:
+        response = await client.get(
+            "/v1/accounts/changes", params={"since": since, "limit": 100}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        changes = response.json()
+        items.extend(changes["items"])
+        since = changes["since"]
+        if not changes["has_more"]:
+            return items, since
+
+
+async def test_account_changes(
+    client: AsyncClient, db_engine, company_factory, monkeypatch
+):
+    monkeypatch.setattr(app_settings, "ACCOUNTS_CHANGES_LAG", 0)
+    company_id = await company_factory()
+    account = {
+        "type": "account-type-3",
+        "currency": "840",
+        "account": uuid4().hex[:16].upper(),
+        "company_id": str(company_id),
+        "company_name": "Changes company",
+    }
+    _, since = await _poll(client, "")
+
+    response = await client.post("/v1/accounts", json=account)
+    account_id = response.json()["id"]
+    items, since = await _poll(client, since)
+    assert [(i["id"], i["archived"]) for i in items] == [(account_id, False)]
+
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update accounts set archived = true where id = :id"),
+            {"id": account_id},
+        )
+    items, since = await _poll(client, since)
+    assert [(i["id"], i["archived"]) for i in items] == [(account_id, True)]
+    assert set(items[0]) == {"id", "company_id", "archived", "modified"}
+
+    assert await _poll(client, since) == ([], since)
+
+
+async def test_account_changes_invalid_watermark(client: AsyncClient):
+    response = await client.get("/v1/accounts/changes", params={"since": "invalid"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
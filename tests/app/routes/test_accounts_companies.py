@@ -0,0 +1,50 @@
+import json
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_get_accounts_by_company_ids(client: AsyncClient, company_factory):
+    company_ids = [await company_factory(), await company_factory()]
+    empty_company_id = str(uuid4())
+    prefix = uuid4().hex[:8].upper()
+    accounts = [
+        {
+            "type": "account-type-3",
+            "currency": currency,
+            "account": f"{prefix}{i}{currency}",
+            "company_id": str(company_id),
+            "company_name": "Companies test",
+        }
+        for i, company_id in enumerate(company_ids)
+        for currency in ("643", "840")
+    ]
+    body = {"company_ids": [*map(str, company_ids), empty_company_id]}
+    await client.post("/v1/accounts/bulk", json=accounts)
+
+    response = await client.post("/v1/accounts/company-ids?fields=account", json=body)
+    assert response.status_code == status.HTTP_200_OK
+    groups = {
+        company_id: sorted(a["account"] for a in company_accounts)
+        for company_id, company_accounts in response.json().items()
+    }
+    assert groups == {
+        str(company_ids[0]): [f"{prefix}0643", f"{prefix}0840"],
+        str(company_ids[1]): [f"{prefix}1643", f"{prefix}1840"],
+        empty_company_id: [],
+    }
+
+    response = await client.post(
+        "/v1/accounts/company-ids?fields=account&stream=true", json=body
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {
+        line["company_id"]: sorted(a["account"] for a in line["accounts"])
+        for line in lines
+    } == groups
+    assert len(lines) == 3
@@ -0,0 +1,40 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+
+def _account(number, company_id, currency="840"):
+    return {
+        "type": "account-type-1",
+        "currency": currency,
+        "account": number,
+        "company_id": str(company_id),
+        "company_name": "Create company",
+        "additional_info": {"bank_name": "Bank"},
+    }
+
+
+async def test_create_account(client: AsyncClient, company_factory):
+    company_id = await company_factory()
+    prefix = uuid4().hex[:8].upper()
+    # concurrent requests: the unique index keeps one account per company and currency
+    responses = await asyncio.gather(
+        *[
+            client.post("/v1/accounts", json=_account(f"{prefix}{i:04}", company_id))
+            for i in range(5)
+        ]
+    )
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [status.HTTP_200_OK] * 4 + [status.HTTP_201_CREATED]
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert responses[0].json()["company_name"] == "Create company"
+
+    response = await client.post(
+        "/v1/accounts", json=_account(f"{prefix}0000", company_id, "978")
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
@@ -0,0 +1,133 @@
+import json
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_account_etag(client: AsyncClient, db_engine, company_factory):
+    company_id = await company_factory()
+    account = {
+        "type": "account-type-3",
+        "currency": "840",
+        "account": uuid4().hex[:16].upper(),
+        "company_id": str(company_id),
+        "company_name": "ETag company",
+    }
+    response = await client.post("/v1/accounts", json=account)
+    account_id = response.json()["id"]
+
+    for url in (
+        f"/v1/accounts/{account_id}",
+        f"/v1/accounts/company-id/{company_id}",
+    ):
+        response = await client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        # another representation
+        response = await client.get(f"{url}?fields=id", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+
+    # a company rename changes the account representation (company_name)
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update companies set name = 'ETag company 2' where id = :id"),
+            {"id": company_id},
+        )
+    response = await client.get(
+        f"/v1/accounts/company-id/{company_id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["company_name"] == "ETag company 2"
+
+
+async def test_accounts_list_etag(client: AsyncClient, db_engine, company_factory):
+    company_id = await company_factory()
+    params = {
+        "filter": json.dumps(
+            {"property": "client_id", "operator": "=", "value": str(company_id)}
+        ),
+        "sort": json.dumps({"property": "created", "direction": "asc"}),
+        "size": 1,
+    }
+    ids = []
+    for currency in ("840", "978"):
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": currency,
+                "account": uuid4().hex[:16].upper(),
+                "company_id": str(company_id),
+                "company_name": "ETag list company",
+            },
+        )
+        ids.append(response.json()["id"])
+
+    response = await client.get("/v1/accounts", params=params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] == 2
+    etag = response.headers["ETag"]
+    first_id = response.json()["items"][0]["id"]
+    other_id = next(i for i in ids if i != first_id)
+
+    response = await client.get(
+        "/v1/accounts", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+
+    # the ETag is derived from the accounts under the filters: a change of a row
+    # on another page changes every page
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update accounts set modified = now() where id = :id"),
+            {"id": other_id},
+        )
+    response = await client.get(
+        "/v1/accounts", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update accounts set archived = true where id = :id"),
+            {"id": other_id},
+        )
+    response = await client.get(
+        "/v1/accounts", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] == 1
+    etag = response.headers["ETag"]
+
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update companies set name = 'ETag list company 2' where id = :id"),
+            {"id": company_id},
+        )
+    response = await client.get(
+        "/v1/accounts", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["items"][0]["company_name"] == "ETag list company 2"
+
+    # the cursor is validated before any ETag comparison
+    response = await client.get(
+        "/v1/accounts",
+        params={**params, "cursor": "invalid"},
+        headers={"If-None-Match": "*"},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
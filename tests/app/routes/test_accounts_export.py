@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette import status
+
+from app.services.export import EXPORT_FIELDS
+
+pytestmark = pytest.mark.asyncio
+
+SORT = json.dumps({"property": "created", "direction": "desc"})
+
+
+def _company_filter(company_id) -> str:
+    return json.dumps(
+        {"property": "client_id", "operator": "=", "value": str(company_id)}
+    )
+
+
+@pytest.fixture
+async def company_accounts(client: AsyncClient, db_engine, company_factory):
+    """3 accounts of a new company (one archived), and the company id"""
+    company_id = await company_factory()
+    ids = []
+    for currency in ("643", "840", "978"):
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": currency,
+                "account": uuid4().hex[:16].upper(),
+                "company_id": str(company_id),
+                "company_name": "Société d'export",
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        ids.append(response.json()["id"])
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update accounts set archived = true where id = :id"),
+            {"id": ids[1]},
+        )
+    return company_id
+
+
+async def _expected(client: AsyncClient, company_id) -> list[dict]:
+    """The same accounts read from the list endpoint, in the same order"""
+    response = await client.get(
+        "/v1/accounts",
+        params={
+            "filter": _company_filter(company_id),
+            "sort": SORT,
+            "fields": ",".join(EXPORT_FIELDS),
+        },
+    )
+    return response.json()["items"]
+
+
+async def _export(client: AsyncClient, company_id, export_format: str):
+    response = await client.get(
+        "/v1/accounts/export",
+        params={
+            "format": export_format,
+            "filter": _company_filter(company_id),
+            "sort": SORT,
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response
+
+
+async def test_export_ndjson(client, company_accounts):
+    response = await _export(client, company_accounts, "ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.content.endswith(b"\n")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    expected = await _expected(client, company_accounts)
+    assert len(rows) == len(expected) == 2  # the archived account is filtered out
+    for row, account in zip(rows, expected):
+        assert list(row) == EXPORT_FIELDS
+        assert row["id"] == account["id"]
+        assert row["type"] == "account-type-3"
+        assert row["company_id"] == str(company_accounts)
+        assert row["company_name"] == "Société d'export"
+        assert row["additional_info"] == {}
+        assert datetime.fromisoformat(row["created"]) == datetime.fromisoformat(
+            account["created"]
+        )
+    assert rows[0]["created"] > rows[1]["created"]
+
+
+async def test_export_csv(client, company_accounts):
+    response = await _export(client, company_accounts, "csv")
+    assert response.headers["content-type"].startswith("text/csv")
+
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == EXPORT_FIELDS
+    expected = await _expected(client, company_accounts)
+    assert [r[0] for r in rows] == [a["id"] for a in expected]
+    for values in rows:
+        row = dict(zip(header, values))
+        assert row["type"] == "account-type-3"
+        assert row["company_name"] == "Société d'export"
+        assert json.loads(row["additional_info"]) == {}
+        datetime.fromisoformat(row["modified"])
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+async def test_export_columnar(client, company_accounts, export_format):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    def read(content: bytes):
+        if export_format == "parquet":
+            return pq.read_table(pa.BufferReader(content))
+        return pa.ipc.open_stream(content).read_all()
+
+    response = await _export(client, company_accounts, export_format)
+    table = read(response.content)
+    assert table.column_names == EXPORT_FIELDS
+    expected = await _expected(client, company_accounts)
+    assert table.column("id").to_pylist() == [a["id"] for a in expected]
+    assert table.column("type").to_pylist() == ["account-type-3"] * 2
+    assert [json.loads(v) for v in table.column("additional_info").to_pylist()] == [
+        {},
+        {},
+    ]
+    assert [v.isoformat() for v in table.column("created").to_pylist()] == [
+        datetime.fromisoformat(a["created"]).astimezone(v.tzinfo).isoformat()
+        for a, v in zip(expected, table.column("created").to_pylist())
+    ]
+
+    # an empty result is a valid file with the schema and no rows
+    response = await _export(client, uuid4(), export_format)
+    table = read(response.content)
+    assert table.column_names == EXPORT_FIELDS
+    assert table.num_rows == 0
@@ -0,0 +1,76 @@
+import json
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def company_account(client: AsyncClient, company_factory):
+    """An account of a new company: (account id, company id)"""
+    company_id = await company_factory()
+    response = await client.post(
+        "/v1/accounts",
+        json={
+            "type": "account-type-3",
+            "currency": "840",
+            "account": uuid4().hex[:16].upper(),
+            "company_id": str(company_id),
+            "company_name": "Fields company",
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()["id"], company_id
+
+
+async def _get_accounts(client: AsyncClient, account_id, company_id, fields) -> list:
+    """The account read from the single account and the list endpoints"""
+    params = {} if fields is None else {"fields": fields}
+    single = await client.get(f"/v1/accounts/{account_id}", params=params)
+    assert single.status_code == status.HTTP_200_OK
+    page = await client.get(
+        "/v1/accounts",
+        params={
+            **params,
+            "filter": json.dumps(
+                {"property": "client_id", "operator": "=", "value": str(company_id)}
+            ),
+        },
+    )
+    assert page.status_code == status.HTTP_200_OK
+    return [single.json(), *page.json()["items"]]
+
+
+@pytest.mark.parametrize(
+    "fields, keys",
+    [
+        ("currency", {"id", "currency"}),
+        ("id,type", {"id", "type"}),
+        ("account, company_name", {"id", "account", "company_name"}),
+        (",", {"id"}),
+    ],
+)
+async def test_sparse_fields(client, company_account, fields, keys):
+    for account in await _get_accounts(client, *company_account, fields):
+        # id is always returned, company_name only when asked
+        assert set(account) == keys
+        assert account["id"] == company_account[0]
+        if "company_name" in keys:
+            assert account["company_name"] == "Fields company"
+
+
+async def test_all_fields(client, company_account):
+    for account in await _get_accounts(client, *company_account, None):
+        assert account["company_name"] == "Fields company"
+        # the account number is returned only when requested
+        assert "account" not in account
+
+
+async def test_unknown_field(client, company_account):
+    account_id, _ = company_account
+    for url in (f"/v1/accounts/{account_id}", "/v1/accounts"):
+        response = await client.get(url, params={"fields": "id,unknown"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,121 @@
+import json
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+SORTS = {
+    "asc": [{"property": "created", "direction": "asc"}],
+    "desc": [{"property": "modified", "direction": "desc"}],
+    "mixed": [
+        {"property": "created", "direction": "asc"},
+        {"property": "modified", "direction": "desc"},
+    ],
+}
+
+
+@pytest.fixture
+async def tied_accounts(client: AsyncClient, db_engine, company_factory):
+    """
+    7 accounts of a new company: 2 `created` values, one `modified` value (a single
+    update statement), the order is decided by the id tiebreaker
+    """
+    company_id = await company_factory()
+    for currency in ("643", "840", "978", "156", "826", "392", "756"):
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": currency,
+                "account": uuid4().hex[:16].upper(),
+                "company_id": str(company_id),
+                "company_name": "Keyset company",
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text(
+                "update accounts set created = case when currency < '700'"
+                " then timestamptz '2026-01-01' else timestamptz '2026-01-02' end"
+                " where company_id = :id"
+            ),
+            {"id": company_id},
+        )
+        result = await connection.execute(
+            text("select id, created, modified from accounts where company_id = :id"),
+            {"id": company_id},
+        )
+        rows = result.all()
+    return company_id, rows
+
+
+def _expected_ids(rows, sort: list) -> list[UUID]:
+    # stable sorts from the last key: the id tiebreaker follows the last criterion
+    rows = sorted(rows, key=lambda r: r.id, reverse=sort[-1]["direction"] == "desc")
+    for criterion in reversed(sort):
+        rows = sorted(
+            rows,
+            key=lambda r: getattr(r, criterion["property"]),
+            reverse=criterion["direction"] == "desc",
+        )
+    return [r.id for r in rows]
+
+
+async def _walk(client: AsyncClient, params: dict) -> list[UUID]:
+    ids, cursor, pages = [], "", 0
+    while cursor is not None:
+        response = await client.get("/v1/accounts", params={**params, "cursor": cursor})
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["items"]) <= 2
+        ids.extend(UUID(a["id"]) for a in page["items"])
+        cursor = page["next_cursor"]
+        pages += 1
+        assert pages <= 10
+    return ids
+
+
+@pytest.mark.parametrize("sort", SORTS.keys())
+async def test_keyset_walk(client, tied_accounts, sort):
+    company_id, rows = tied_accounts
+    params = {
+        "filter": json.dumps(
+            {"property": "client_id", "operator": "=", "value": str(company_id)}
+        ),
+        "sort": json.dumps(SORTS[sort]),
+        "size": 2,
+    }
+
+    ids = await _walk(client, params)
+
+    # every account once, in the sort order: no duplicates nor gaps between pages
+    assert len(ids) == len(set(ids)) == len(rows)
+    assert ids == _expected_ids(rows, SORTS[sort])
+
+
+async def test_keyset_cursor_of_another_sort(client, tied_accounts):
+    company_id, _ = tied_accounts
+    params = {
+        "filter": json.dumps(
+            {"property": "client_id", "operator": "=", "value": str(company_id)}
+        ),
+        "size": 2,
+    }
+    response = await client.get(
+        "/v1/accounts",
+        params={**params, "sort": json.dumps(SORTS["asc"]), "cursor": ""},
+    )
+    cursor = response.json()["next_cursor"]
+    assert cursor is not None
+
+    for sort in ("desc", "mixed"):
+        response = await client.get(
+            "/v1/accounts",
+            params={**params, "sort": json.dumps(SORTS[sort]), "cursor": cursor},
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,47 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_lookup_accounts(client: AsyncClient, company_factory):
+    company_id = await company_factory()
+    prefix = uuid4().hex[:8].upper()
+    accounts = [
+        {
+            "type": "account-type-3",
+            "currency": currency,
+            "account": f"{prefix}{currency}",
+            "company_id": str(company_id),
+            "company_name": "Lookup company",
+        }
+        for currency in ("643", "840")
+    ]
+    missing_id = str(uuid4())
+    response = await client.post("/v1/accounts/bulk", json=accounts)
+    created_id = response.json()[0]["id"]
+
+    response = await client.post(
+        "/v1/accounts/lookup?fields=id,account",
+        json={
+            "ids": [created_id, missing_id],
+            "numbers": [f"{prefix}840", f"{prefix}978"],
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "ids": {
+            created_id: {"id": created_id, "account": f"{prefix}643"},
+            missing_id: None,
+        },
+        "numbers": {
+            f"{prefix}840": {
+                "id": response.json()["numbers"][f"{prefix}840"]["id"],
+                "account": f"{prefix}840",
+            },
+            f"{prefix}978": None,
+        },
+    }
@@ -0,0 +1,83 @@
+import json
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from app.settings import app_settings
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def company_accounts(client: AsyncClient, company_factory):
+    """5 accounts of a new company, and the filter of its accounts"""
+    company_id = await company_factory()
+    for currency in ("643", "840", "978", "156", "826"):
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": currency,
+                "account": uuid4().hex[:16].upper(),
+                "company_id": str(company_id),
+                "company_name": "Pages company",
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+    return json.dumps(
+        {"property": "client_id", "operator": "=", "value": str(company_id)}
+    )
+
+
+async def _get_page(client: AsyncClient, company_filter: str, **params) -> dict:
+    response = await client.get(
+        "/v1/accounts", params={"filter": company_filter, "size": 2, **params}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.mark.parametrize(
+    "page, items, has_next", [(1, 2, True), (3, 1, False), (4, 0, False)]
+)
+async def test_exact_total(client, company_accounts, page, items, has_next):
+    result = await _get_page(client, company_accounts, page=page)
+    assert len(result["items"]) == items
+    # a page past the end still reports the total
+    assert result["total"] == 5
+    assert result["total_estimated"] is False
+    assert result["has_next"] is has_next
+
+
+@pytest.mark.parametrize(
+    "page, items, has_next", [(1, 2, True), (3, 1, False), (4, 0, False)]
+)
+async def test_without_total(client, company_accounts, page, items, has_next):
+    result = await _get_page(client, company_accounts, page=page, include_total="false")
+    assert len(result["items"]) == items
+    assert result["total"] is None
+    assert result["total_estimated"] is False
+    assert result["has_next"] is has_next
+
+
+async def test_estimated_total(client, company_accounts, monkeypatch):
+    # below the threshold the estimate falls back to an exact count
+    monkeypatch.setattr(app_settings, "PAGINATION_ESTIMATE_THRESHOLD", 1000)
+    result = await _get_page(client, company_accounts, total_mode="estimate")
+    assert result["total"] == 5
+    assert result["total_estimated"] is False
+    assert result["has_next"] is True
+
+    result = await _get_page(client, company_accounts, total_mode="estimate", page=4)
+    assert result["items"] == []
+    assert result["total"] == 5
+    assert result["has_next"] is False
+
+    # above the threshold: the planner estimate, not counted
+    monkeypatch.setattr(app_settings, "PAGINATION_ESTIMATE_THRESHOLD", 0)
+    result = await _get_page(client, company_accounts, total_mode="estimate")
+    assert isinstance(result["total"], int)
+    assert result["total_estimated"] is True
+    assert len(result["items"]) == 2
@@ -0,0 +1,54 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette import status
+
+from app.services import accounts
+from app.services.cache import SINGLE_FLIGHT_SHARED
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_cancelled_leader(client: AsyncClient, company_factory, monkeypatch):
+    company_id = await company_factory()
+    paginate = accounts.paginate
+    started = asyncio.Event()
+
+    async def slow_paginate(connection, *args, **kwargs):
+        started.set()
+        await connection.execute(text("select pg_sleep(0.3)"))
+        return await paginate(connection, *args, **kwargs)
+
+    for currency in ("840", "978", "643"):
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": currency,
+                "account": uuid4().hex[:16].upper(),
+                "company_id": str(company_id),
+                "company_name": "Single flight company",
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    monkeypatch.setattr(accounts, "paginate", slow_paginate)
+    shared = SINGLE_FLIGHT_SHARED.labels("accounts")
+    shared_before = shared._value.get()
+
+    url = "/v1/accounts?size=3"
+    leader = asyncio.ensure_future(client.get(url))
+    await asyncio.wait_for(started.wait(), 5)
+    follower = asyncio.ensure_future(client.get(url))
+    await asyncio.sleep(0.05)  # the follower joins the call in flight
+    leader.cancel()
+
+    # the shared call runs on its own connection, not on the leader's session
+    response = await asyncio.wait_for(follower, 10)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["items"]) == 3
+    assert leader.cancelled()
+    assert shared._value.get() == shared_before + 1
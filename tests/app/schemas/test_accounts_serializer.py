@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.schemas.response.accounts import get_response_model_by_type, serialize_account
+from app.types import AccountType
+
+
+@pytest.mark.parametrize("account_type", list(AccountType))
+def test_serialize_account_byte_compatible(account_type):
+    account = SimpleNamespace(
+        id=uuid4(),
+        type=account_type,
+        currency="643",
+        account="40702810900000000001",
+        company_id=uuid4(),
+        company_name='ООО "Ромашка"',
+        additional_info={"bank_name": "Bank", "unknown": 1},
+        archived=False,
+        created=datetime(2022, 10, 1, 23, 26, 45, tzinfo=timezone(timedelta(hours=3))),
+        modified=datetime.now(timezone.utc),
+    )
+    model = get_response_model_by_type(account_type)
+
+    expected = JSONResponse(jsonable_encoder(model.from_orm(account))).body
+    assert ORJSONResponse(serialize_account(account)).body == expected
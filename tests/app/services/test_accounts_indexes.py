@@ -0,0 +1,107 @@
+import json
+from itertools import product
+from urllib import parse
+
+import pytest
+from sqlalchemy import text
+
+from app.api.dependencies import Filters
+from app.api.dependencies.sort import AccountsSort
+from app.database.explain import Explain
+from app.services.accounts import filter_accounts
+
+pytestmark = pytest.mark.asyncio
+
+SEED_SQL = (
+    """
+    insert into companies (id, name)
+    select uuid_generate_v4(), 'Seed company ' || g from generate_series(1, 20000) g
+    """,
+    """
+    insert into accounts (type, currency, account, company_id, additional_info, archived, created, modified)
+    -- account_type_1 only on the first account of a company (ux_accounts_company_currency)
+    select (array['account_type_1', 'account_type_2', 'account_type_3', 'account_type_4'])[
+               case when g <= 20000 then g % 4 + 1 else g % 3 + 2 end
+           ]::account_type,
+           (array['643', '840', '978'])[g % 3 + 1],
+           'SEED' || lpad(g::text, 16, '0'),
+           c.id,
+           jsonb_build_object('bank_name', 'Bank ' || g % 1000),
+           g % 10 = 0,
+           now() - g * interval '1 minute',
+           now() - g * interval '1 second'
+    from generate_series(1, 200000) g
+    join companies c on c.name = 'Seed company ' || (g % 20000 + 1)
+    """,
+    "analyze companies",
+    "analyze accounts",
+)
+
+FILTERS = (
+    None,
+    {"property": "type", "operator": "=", "value": "account-type-1"},
+    {
+        "property": "type",
+        "operator": "in",
+        "value": ["account-type-1", "account-type-3"],
+    },
+    {"property": "currency", "operator": "=", "value": "840"},
+    {"property": "client", "operator": "ilike", "value": "%company 1234%"},
+    {
+        "property": "client_id",
+        "operator": "=",
+        "value": "a422fb8c-046e-4786-a076-93039cc9aab5",
+    },
+    {"property": "account", "operator": "like", "value": "%00001234%"},
+    {"property": "additional_info.bank_name", "operator": "=", "value": "Bank 12"},
+    [
+        {"property": "modified", "operator": ">=", "value": "2022-08-01"},
+        {"property": "modified", "operator": "<", "value": "2022-08-06"},
+    ],
+)
+
+SORTS = (
+    None,
+    {"property": "modified", "direction": "asc"},
+    {"property": "created", "direction": "desc"},
+    {"property": "created", "direction": "asc"},
+)
+
+
+def _plan_nodes(plan):
+    yield plan
+    for subplan in plan.get("Plans", []):
+        yield from _plan_nodes(subplan)
+
+
+def _is_full_scan(node) -> bool:
+    # companies may be read whole to build a hash join, not to evaluate a filter
+    return node["Node Type"] == "Seq Scan" and (
+        node["Relation Name"] == "accounts" or "Filter" in node
+    )
+
+
+async def test_accounts_pages_without_seq_scan(apply_migrations, db_session):
+    for sql in SEED_SQL:
+        await db_session.execute(text(sql))
+
+    seq_scans = []
+    for filter_spec, sort_spec in product(FILTERS, SORTS):
+        filters = Filters(
+            filters=parse.quote(json.dumps(filter_spec)) if filter_spec else None
+        )
+        sort = AccountsSort(sort=json.dumps(sort_spec) if sort_spec else None)
+        # the page query of keyset and include_total=false pagination
+        stmt = sort.apply(filter_accounts(filters)).limit(50)
+
+        plan = await db_session.scalar(Explain(stmt))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        seq_scans.extend(
+            f"{str(filters) or '-'} / {sort}: {node['Relation Name']}"
+            for node in _plan_nodes(plan[0]["Plan"])
+            if _is_full_scan(node)
+        )
+
+    assert not seq_scans, "Sequential scans:\n" + "\n".join(seq_scans)
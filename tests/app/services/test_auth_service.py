@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.services.auth_service import InvalidToken, PrivateAuthService, token_cache
+from app.settings import app_settings
+
+pytestmark = pytest.mark.asyncio
+
+AUTH_INFO = {
+    "id": "523b8267-098d-4b16-b86f-95f923da9ebd",
+    "name": "User",
+    "email": "user@company.com",
+    "company_id": "0fadca55-5645-49a4-9782-44b849930bb7",
+    "company_name": "Company",
+}
+
+
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+JWKS = {
+    "keys": [
+        {
+            **json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(PRIVATE_KEY.public_key())),
+            "kid": "key-1",
+            "use": "sig",
+        }
+    ]
+}
+
+
+class IntrospectionHandler(BaseHTTPRequestHandler):
+    requests = []
+    jwks = JWKS
+
+    def do_GET(self):
+        self.requests.append("jwks")
+        self._send_json(self.jwks)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        token = parse_qs(body)["token"][0]
+        self.requests.append(token)
+        time.sleep(0.05)  # slow upstream: concurrent requests must be coalesced
+
+        if token == "valid":
+            data = {"active": True, "exp": int(time.time()) + 60, **AUTH_INFO}
+        elif token == "non-json":
+            data = b"<html>"
+        elif token == "non-object":
+            data = ["active"]
+        elif token == "string-exp":
+            data = {"active": True, "exp": "soon", **AUTH_INFO}
+        elif token == "null-exp":
+            data = {"active": True, "exp": None, **AUTH_INFO}
+        else:
+            data = {"active": False}
+        self._send_json(data)
+
+    def _send_json(self, data):
+        content = data if isinstance(data, bytes) else json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def introspection_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), IntrospectionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(app_settings, "SSO_INTROSPECT_URL", f"{url}/introspect")
+    monkeypatch.setattr(app_settings, "SSO_JWKS_URL", f"{url}/jwks")
+    IntrospectionHandler.requests = []
+    IntrospectionHandler.jwks = JWKS
+    token_cache.clear()
+    yield IntrospectionHandler.requests
+    server.shutdown()
+    server.server_close()
+
+
+def _jwt(private_key=PRIVATE_KEY, **claims):
+    claims = {
+        "sub": AUTH_INFO["id"],
+        "exp": int(time.time()) + 60,
+        **{k: v for k, v in AUTH_INFO.items() if k != "id"},
+        **claims,
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "key-1"})
+
+
+async def test_introspect_cached_and_coalesced(introspection_server):
+    service = PrivateAuthService()
+    try:
+        results = await asyncio.gather(
+            *[service.introspect("valid") for _ in range(20)]
+        )
+        assert all(r["email"] == AUTH_INFO["email"] for r in results)
+        await service.introspect("valid")
+        assert introspection_server == ["valid"]
+
+        for _ in range(3):
+            with pytest.raises(InvalidToken):
+                await service.introspect("revoked")
+        assert introspection_server == ["valid", "revoked"]
+    finally:
+        await PrivateAuthService.aclose()
+
+
+async def test_authenticate_jwt_locally(introspection_server):
+    service = PrivateAuthService()
+    try:
+        for _ in range(3):
+            auth_info = await service.authenticate(_jwt())
+            assert auth_info == AUTH_INFO
+        # the key set is fetched once, tokens are not introspected
+        assert introspection_server == ["jwks"]
+
+        with pytest.raises(InvalidToken):
+            await service.authenticate(_jwt(exp=int(time.time()) - 1))
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        with pytest.raises(InvalidToken):
+            await service.authenticate(_jwt(private_key=other_key))
+
+        # opaque tokens are introspected
+        assert (await service.authenticate("valid"))["email"] == AUTH_INFO["email"]
+        assert introspection_server == ["jwks", "valid"]
+    finally:
+        await PrivateAuthService.aclose()
+
+
+@pytest.mark.parametrize("jwks", [b"<html>", {"keys": []}, {"keys": "invalid"}])
+async def test_authenticate_jwt_jwks_error(introspection_server, jwks):
+    IntrospectionHandler.jwks = jwks
+    service = PrivateAuthService()
+    try:
+        # the key can't be found: an invalid token, not a server error
+        for _ in range(2):
+            with pytest.raises(InvalidToken):
+                await service.authenticate(_jwt())
+        # a failed refresh is not retried before MIN_REFRESH_INTERVAL
+        assert introspection_server == ["jwks"]
+    finally:
+        await PrivateAuthService.aclose()
+
+
+@pytest.mark.parametrize("token", ["non-json", "non-object", "string-exp"])
+async def test_introspect_malformed_response(introspection_server, token):
+    service = PrivateAuthService()
+    try:
+        for _ in range(2):
+            with pytest.raises(httpx.DecodingError):
+                await service.introspect(token)
+        # SSO failures are not cached
+        assert introspection_server == [token, token]
+    finally:
+        await PrivateAuthService.aclose()
+
+
+async def test_introspect_without_exp(introspection_server):
+    service = PrivateAuthService()
+    try:
+        # no expiry: cached for SSO_CACHE_TTL
+        for _ in range(2):
+            auth_info = await service.introspect("null-exp")
+            assert auth_info["email"] == AUTH_INFO["email"]
+        assert introspection_server == ["null-exp"]
+    finally:
+        await PrivateAuthService.aclose()
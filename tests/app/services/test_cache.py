@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.services.cache import SingleFlight, TTLCache
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_ttl_and_lru():
+    clock = Clock()
+    cache = TTLCache("test_lru", maxsize=2, ttl=10, clock=clock)
+    cache.set("a", b"a")
+    cache.set("b", b"b")
+    assert cache.get("a") == b"a"
+
+    # "b" is the least recently used
+    cache.set("c", b"c")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a"
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert len(cache) == 0
+
+
+def test_cache_invalidate_tag():
+    cache = TTLCache("test_tags", maxsize=10, ttl=10)
+    cache.set("id", b"1", tags=(("account", 1), ("company", 1)))
+    cache.set("number", b"1", tags=(("account", 1), ("company", 1)))
+    cache.set("other", b"2", tags=(("account", 2), ("company", 1)))
+
+    cache.invalidate_tag(("account", 1))
+    assert cache.get("id") is None
+    assert cache.get("number") is None
+    assert cache.get("other") == b"2"
+
+    cache.invalidate_tag(("company", 1))
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def query(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return [value]
+
+    results = await asyncio.gather(*[flight.do("key", query, 1) for _ in range(10)])
+
+    assert calls == [1]
+    assert all(r is results[0] for r in results)
+
+    # done calls are not kept
+    assert await flight.do("key", query, 2) == [2]
@@ -0,0 +1,120 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.services.events import ChangeBroadcaster, account_events
+from app.settings import app_settings
+
+pytestmark = pytest.mark.asyncio
+
+
+def _row(archived=False):
+    return {
+        "id": str(uuid4()),
+        "account": "40702810000000000001",
+        "old_account": None,
+        "company_id": str(uuid4()),
+        "archived": archived,
+        "modified": "2026-10-17T21:05:12.41839+00:00",
+    }
+
+
+def _change(op="UPDATE", archived=False, size=1):
+    return {
+        "table": "accounts",
+        "op": op,
+        "rows": [_row(archived) for _ in range(size)],
+    }
+
+
+async def test_broadcaster_fan_out():
+    broadcaster = ChangeBroadcaster(queue_size=10)
+    streams = [account_events(broadcaster, keepalive_interval=0.05) for _ in range(3)]
+    pending = [asyncio.ensure_future(s.__anext__()) for s in streams]
+    await asyncio.sleep(0)
+    assert len(broadcaster) == 3
+
+    broadcaster.publish({"table": "companies", "op": "UPDATE", "rows": [_row()]})
+    broadcaster.publish(_change(op="INSERT"))
+    events = await asyncio.gather(*pending)
+    assert all(e == events[0] for e in events)
+    assert events[0].startswith(b"event: created\nid: ")
+    assert b'"modified":"2026-10-17T21:05:12.418390+00:00"' in events[0]
+
+    # idle stream: keepalive comment
+    assert await streams[0].__anext__() == b": keepalive\n\n"
+
+    broadcaster.publish(_change(archived=True))
+    assert (await streams[1].__anext__()).startswith(b"event: archived\n")
+
+    # the rows changed by a statement: one queue item, an event per row
+    broadcaster.publish(_change(size=3))
+    assert (await streams[1].__anext__()).count(b"event: updated\n") == 3
+
+    # too many rows to list: the streams are closed, clients resume from the feed
+    broadcaster.publish({"table": "accounts", "op": "UPDATE", "rows": None})
+    for stream in streams:
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+    assert len(broadcaster) == 0
+
+
+async def test_broadcaster_disconnects_lagging_subscriber():
+    broadcaster = ChangeBroadcaster(queue_size=2)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+    for _ in range(2):
+        broadcaster.publish(_change())
+        assert await fast.get(1) is not None
+
+    broadcaster.publish(_change())
+    assert len(broadcaster) == 1
+    assert await fast.get(1) is not None
+    with pytest.raises(EOFError):
+        await slow.get(1)
+
+
+async def test_replay_since(client, db_engine, company_factory, monkeypatch):
+    monkeypatch.setattr(app_settings, "ACCOUNTS_CHANGES_LAG", 0)
+    company_id = await company_factory()
+    # the watermark of the last change: only the accounts below are replayed
+    since = ""
+    while True:
+        response = await client.get(
+            "/v1/accounts/changes", params={"since": since, "limit": 1000}
+        )
+        changes = response.json()
+        since = changes["since"]
+        if not changes["has_more"]:
+            break
+
+    ids = []
+    for currency in ("840", "978"):
+        response = await client.post(
+            "/v1/accounts",
+            json={
+                "type": "account-type-3",
+                "currency": currency,
+                "account": uuid4().hex[:16].upper(),
+                "company_id": str(company_id),
+                "company_name": "Events company",
+            },
+        )
+        ids.append(response.json()["id"])
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("update accounts set archived = true where id = :id"),
+            {"id": ids[1]},
+        )
+
+    stream = account_events(ChangeBroadcaster(queue_size=10), since=since)
+    events = (await stream.__anext__()).split(b"\n\n")
+    await stream.aclose()
+    # the replayed rows carry driver UUIDs: serialized as strings
+    assert events[0].startswith(b"event: created\nid: ")
+    assert f'"id":"{ids[0]}"'.encode() in events[0]
+    assert f'"company_id":"{company_id}"'.encode() in events[0]
+    assert events[1].startswith(b"event: archived\nid: ")
+    assert f'"id":"{ids[1]}"'.encode() in events[1]
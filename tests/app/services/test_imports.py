@@ -0,0 +1,60 @@
+import io
+from uuid import uuid4
+
+import pytest
+
+from app.services.imports import _csv_records, import_accounts, read_report
+from app.types import ImportFormat
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _chunks(data: bytes, size: int):
+    stream = io.BytesIO(data)
+    while chunk := stream.read(size):
+        yield chunk
+
+
+async def test_csv_records_split_across_chunks():
+    data = (
+        "type,currency,account,company_id,company_name,additional_info\n"
+        'account-type-3,840,ACC00000001,%(id)s,"Company\nName",\n'
+        'account-type-1,840,ACC00000002,%(id)s,Company,"{""bank_name"": ""Bank""}"\n'
+        "account-type-1,840,ACC00000003,%(id)s,Company,{bad json}\n"
+    ) % {"id": uuid4()}
+    # chunk boundaries inside multibyte characters and quoted values
+    records = [r async for r in _csv_records(_chunks(data.encode(), 7))]
+
+    assert [(line, error is None) for line, _, error in records] == [
+        (2, True),
+        (4, True),
+        (5, False),
+    ]
+    assert records[0][1]["company_name"] == "Company\nName"
+    assert records[1][1]["additional_info"] == {"bank_name": "Bank"}
+
+
+async def test_import_accounts(company_factory):
+    company_id = await company_factory()
+    prefix = uuid4().hex[:8].upper()
+    lines = [
+        f'{{"type": "account-type-1", "currency": "840", "account": "{prefix}0001",'
+        f' "company_id": "{company_id}", "company_name": "Import",'
+        ' "additional_info": {"bank_name": "Bank"}}',
+        # one account_type_1 account per company in a given currency
+        f'{{"type": "account-type-1", "currency": "840", "account": "{prefix}0002",'
+        f' "company_id": "{company_id}", "company_name": "Import",'
+        ' "additional_info": {"bank_name": "Bank"}}',
+        f'{{"type": "account-type-3", "currency": "978", "account": "{prefix}0003",'
+        f' "company_id": "{company_id}", "company_name": "Import"}}',
+        '{"type": "account-type-3"}',
+        "not json",
+    ]
+    data = "\n".join(lines).encode()
+    report = await import_accounts(_chunks(data, 64), ImportFormat.ndjson, 2)
+    report = b"".join([c async for c in read_report(report)]).decode()
+
+    *errors, summary = report.splitlines()
+    # invalid lines are reported while reading, not created ones after the merge
+    assert [e.split(",")[0] for e in errors] == ['{"line":4', '{"line":5', '{"line":2']
+    assert summary == ('{"summary":{"rows":5,"created":2,"invalid":2,"skipped":1}}')
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.database.listener import ChangeListener
+from app.services.accounts import accounts_cache, evict_changed_accounts
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_listener_evicts_changed_company(db_engine, company_factory):
+    company_id = await company_factory("Listener")
+    changes = []
+    received = asyncio.Event()
+
+    def on_change(change):
+        changes.append(change)
+        received.set()
+
+    listener = ChangeListener(db_engine.url)
+    listener.add_callback(evict_changed_accounts)
+    listener.add_callback(on_change)
+    listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), 5)
+        accounts_cache.set(("test", company_id), b"{}", tags=[("company", company_id)])
+
+        # notifications are sent on commit: a committed transaction
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                text("update companies set name = 'Listener 2' where id = :id"),
+                {"id": company_id},
+            )
+        await asyncio.wait_for(received.wait(), 5)
+    finally:
+        await listener.stop()
+
+    assert changes[0]["table"] == "companies"
+    assert changes[0]["op"] == "UPDATE"
+    assert changes[0]["rows"][0]["id"] == str(company_id)
+    assert accounts_cache.get(("test", company_id)) is None
+
+
+async def test_listener_batches_statement_changes(db_engine, company_factory):
+    company_id = await company_factory("Listener")
+    changes = []
+    listener = ChangeListener(db_engine.url)
+    listener.add_callback(changes.append)
+    listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), 5)
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                text(
+                    "insert into accounts (type, currency, account, company_id)"
+                    " select 'account_type_3', '840', 'LISTENER' || lpad(g::text, 12, '0'),"
+                    " :id from generate_series(1, 45) g"
+                ),
+                {"id": company_id},
+            )
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                text(
+                    "insert into accounts (type, currency, account, company_id)"
+                    " select 'account_type_3', '978', 'LISTENER' || lpad(g::text, 12, '0'),"
+                    " :id from generate_series(1001, 2001) g"
+                ),
+                {"id": company_id},
+            )
+        for _ in range(50):
+            if len(changes) == 4:
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        await listener.stop()
+
+    # a notification per 20 rows of a statement, not per row
+    assert [(c["table"], c["op"]) for c in changes] == [("accounts", "INSERT")] * 4
+    assert sorted(len(c["rows"]) for c in changes[:3]) == [5, 20, 20]
+    assert {r["company_id"] for c in changes[:3] for r in c["rows"]} == {
+        str(company_id)
+    }
+    # more than 1000 rows: a single notification without the rows
+    assert changes[3]["rows"] is None
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.api.dependencies.sort.accounts import AccountsSort
+from app.database.errors import InvalidPageCursor
+from app.paginate_patch import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    keyset = AccountsSort(sort=None).get_keyset()
+    values = [datetime.now(timezone.utc), uuid4()]
+
+    assert decode_cursor(keyset, encode_cursor(keyset, values)) == values
+
+
+def test_cursor_sort_mismatch():
+    keyset = AccountsSort(sort=None).get_keyset()
+    cursor = encode_cursor(keyset, [datetime.now(timezone.utc), uuid4()])
+    other_keyset = AccountsSort(sort='{"property": "created"}').get_keyset()
+
+    with pytest.raises(InvalidPageCursor):
+        decode_cursor(other_keyset, cursor)
+
+    with pytest.raises(InvalidPageCursor):
+        decode_cursor(keyset, "not-a-cursor")
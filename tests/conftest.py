@@ -1,10 +1,12 @@
 import asyncio
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from uuid import UUID, uuid4
 
 import pytest
 import pytest_asyncio
 from fastapi import FastAPI
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.settings import app_settings
@@ -80,3 +82,36 @@ async def db_session(db_engine):
         await session.close()  # type: ignore
         await trans.rollback()
         await connection.close()
+
+
+@pytest_asyncio.fixture
+async def company_factory(apply_migrations, db_engine):
+    """
+    New company ids, the companies and their accounts are deleted after the test.
+    With a name the company is inserted, otherwise it is left to the tested code.
+    """
+    company_ids = []
+
+    async def create(name: Optional[str] = None) -> UUID:
+        company_id = uuid4()
+        company_ids.append(company_id)
+        if name is not None:
+            async with db_engine.begin() as connection:
+                await connection.execute(
+                    text("insert into companies (id, name) values (:id, :name)"),
+                    {"id": company_id, "name": name},
+                )
+        return company_id
+
+    try:
+        yield create
+    finally:
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                text("delete from accounts where company_id = any(:ids)"),
+                {"ids": company_ids},
+            )
+            await connection.execute(
+                text("delete from companies where id = any(:ids)"),
+                {"ids": company_ids},
+            )